@@ -1,7 +1,6 @@
 from django.contrib import admin
-from django.db.models import Sum
 
-from core.models import MuscleGroup, Exercise, Training, UserProfile, TrainingExercise, Meal, MealFood, Food
+from core.models import MuscleGroup, Exercise, Training, UserProfile, TrainingExercise, Meal, MealFood, Food, DailyNutrition
 
 
 @admin.register(MuscleGroup)
@@ -48,16 +47,15 @@ class MealAdmin(admin.ModelAdmin):
     ]
     list_display = ['id', 'meal_type', 'total']
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_total_calories()
+
     def total(self, obj):
-        meal_foods = MealFood.objects.filter(meal=obj)  # .aggregate(total_calories=Sum('nb_value'))['total_calories']
-        resultado = 0
+        return obj.total_calories
 
-        for meal_food in meal_foods:
-            if meal_food.value <= 0 or meal_food.food.value <= 0:
-                continue
-            total_food = (meal_food.value / meal_food.food.value) * meal_food.food.total_kcal
-            resultado += total_food
+    total.short_description = 'Total de Calorias'
 
-        return resultado
 
-    total.short_description = 'Total de Calorias'
+@admin.register(DailyNutrition)
+class DailyNutritionAdmin(admin.ModelAdmin):
+    list_display = ['id', 'user', 'date', 'total_kcal']
@@ -0,0 +1,132 @@
+import json
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.utils.dateparse import parse_date
+from django.utils.translation import gettext as _
+from django.views import View
+from rest_framework import exceptions, status
+from rest_framework.authtoken.models import Token
+from rest_framework.request import Request
+from rest_framework.utils.encoders import JSONEncoder
+
+from core import authentication, metrics, models, pagination, serializers
+from core.authentication import CachedTokenAuthentication
+from core.viewsets import group_by_day, summary_period
+
+
+class AsyncAPIView(View):
+    authentication = CachedTokenAuthentication()
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            credentials = await self.authentication.aauthenticate(request)
+            if credentials is None:
+                raise exceptions.NotAuthenticated()
+        except exceptions.APIException as exc:
+            response = self.response({'detail': exc.detail}, status=status.HTTP_401_UNAUTHORIZED)
+            response['WWW-Authenticate'] = self.authentication.authenticate_header(request)
+            return response
+        request.user, request.auth = credentials
+        return await super().dispatch(request, *args, **kwargs)
+
+    def response(self, data, status=status.HTTP_200_OK):
+        with metrics.serialization():
+            return JsonResponse(data, status=status, encoder=JSONEncoder, safe=False)
+
+    async def paginate(self, request, queryset, serializer_class):
+        paginator = pagination.DateCursorPagination()
+        request = Request(request)
+        try:
+            rows = await sync_to_async(paginator.paginate_queryset)(queryset, request)
+        except exceptions.NotFound as exc:
+            return self.response({'detail': exc.detail}, status=status.HTTP_404_NOT_FOUND)
+        serializer = serializer_class(rows, many=True, context={'request': request})
+        return self.response({
+            'next': paginator.get_next_link(),
+            'previous': paginator.get_previous_link(),
+            'results': serializer.data,
+        })
+
+# AsyncAPIView: base das views assíncronas. Autentica pelo mesmo token (CachedTokenAuthentication.aauthenticate)
+# e responde JSON com o encoder do DRF. Sem o ciclo de request/response do DRF (que é síncrono), cada requisição
+# não fica presa a uma thread enquanto espera o banco.
+# paginate: usa a própria DateCursorPagination das views síncronas, então next, previous e o formato do ?cursor=
+# são os mesmos (um cursor de /api/meal/ vale em /api/async/meal/). A consulta da página roda em sync_to_async,
+# já que a paginação do DRF é síncrona; as demais consultas da view usam o ORM assíncrono.
+
+
+class MealListView(AsyncAPIView):
+    async def get(self, request):
+        queryset = models.Meal.active_objects.filter(user=request.user).with_total_calories()
+        return await self.paginate(request, queryset, serializers.MealSerializer)
+
+
+class TrainingListView(AsyncAPIView):
+    async def get(self, request):
+        queryset = models.Training.active_objects.filter(user=request.user).select_related('user')
+        try:
+            if request.GET.get('date_after'):
+                queryset = queryset.filter(date__gte=parse_date(request.GET['date_after']))
+            if request.GET.get('date_before'):
+                queryset = queryset.filter(date__lte=parse_date(request.GET['date_before']))
+        except (TypeError, ValueError):
+            return self.response({"detail": "Informe as datas no formato AAAA-MM-DD."},
+                                 status=status.HTTP_400_BAD_REQUEST)
+        return await self.paginate(request, queryset, serializers.TrainingSerializer)
+
+
+class DailySummaryView(AsyncAPIView):
+    async def get(self, request):
+        period, error = summary_period(request.GET)
+        if error:
+            return self.response({"detail": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = models.Meal.active_objects.filter(user=request.user, date__range=period).calories_by_day()
+        return self.response(group_by_day([row async for row in queryset]))
+
+
+class ProfileMeView(AsyncAPIView):
+    async def get(self, request):
+        profile = await models.UserProfile.objects.select_related('login').filter(login=request.user).afirst()
+        if profile is None:
+            profile = models.UserProfile(login=request.user)
+        return self.response(serializers.UserProfileSerializer(profile).data)
+
+# Versões assíncronas (ORM assíncrono) das leituras mais frequentes, com as mesmas respostas das views síncronas:
+# GET /api/async/meal/                      -> /api/meal/
+# GET /api/async/training/                  -> /api/training/ (filtros date_after e date_before)
+# GET /api/async/meal/daily-summary/        -> /api/meal/daily-summary/
+# GET /api/async/userprofile/me/            -> /api/userprofile/me/
+
+
+class LogInView(View):
+    async def post(self, request):
+        with metrics.timer('login.request_seconds'):
+            try:
+                data = json.loads(request.body) if request.content_type == 'application/json' else request.POST
+                credentials = {field: data.get(field) for field in ('username', 'password')}
+            except (ValueError, AttributeError):
+                return JsonResponse({'detail': _('JSON parse error.')}, status=status.HTTP_400_BAD_REQUEST)
+            errors = {
+                field: [_('This field is required.')]
+                for field, value in credentials.items()
+                if not isinstance(value, str) or not value
+            }
+            if errors:
+                return JsonResponse(errors, status=status.HTTP_400_BAD_REQUEST)
+
+            with metrics.timer('login.authenticate_seconds'):
+                user = await sync_to_async(authentication.authenticate_in_worker, thread_sensitive=False)(
+                    request, **credentials
+                )
+            if user is None:
+                return JsonResponse({'non_field_errors': [_('Unable to log in with provided credentials.')]},
+                                    status=status.HTTP_400_BAD_REQUEST)
+            token, _created = await Token.objects.aget_or_create(user=user)
+            return JsonResponse({'token': token.key, 'id': user.pk, 'username': user.username})
+
+# LogInView: POST /api/async/login/, o login (UserLogIn, /api-user-login/) para servidores ASGI, com a mesma
+# resposta e as mesmas mensagens de erro. Aceita JSON ou formulário. Usa o mesmo authenticate() do Django, mas
+# numa thread do executor (authentication.authenticate_in_worker): o hash da senha não ocupa o event loop nem a
+# thread das views síncronas, que sob ASGI é uma só para todas as requisições.
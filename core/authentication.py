@@ -0,0 +1,86 @@
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth import authenticate
+from django.core.cache import caches
+from django.db import connections
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication, get_authorization_header
+from rest_framework.authtoken.models import Token
+
+
+def token_cache():
+    return caches[settings.AUTH_TOKEN_CACHE_ALIAS]
+
+
+def token_cache_key(key):
+    return f'auth:token:{hashlib.sha256(key.encode()).hexdigest()}'
+
+
+def forget_tokens(keys):
+    token_cache().delete_many([token_cache_key(key) for key in keys])
+
+# O token fica no cache sob o hash da chave (a chave em si não é gravada no backend).
+# forget_tokens: remove tokens do cache; chamado pelos signals quando o token é apagado
+# ou o usuário é alterado/desativado (ver core/signals.py).
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    def authenticate_credentials(self, key):
+        cache = token_cache()
+        token = cache.get(token_cache_key(key))
+        if token is None:
+            user, token = super().authenticate_credentials(key)
+            cache.set(token_cache_key(key), token)
+        return token.user, token
+
+    async def aauthenticate(self, request):
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) == 1:
+            raise exceptions.AuthenticationFailed(_('Invalid token header. No credentials provided.'))
+        if len(auth) > 2:
+            raise exceptions.AuthenticationFailed(_('Invalid token header. Token string should not contain spaces.'))
+        try:
+            key = auth[1].decode()
+        except UnicodeError:
+            raise exceptions.AuthenticationFailed(
+                _('Invalid token header. Token string should not contain invalid characters.')
+            )
+        return await self.aauthenticate_credentials(key)
+
+    async def aauthenticate_credentials(self, key):
+        cache = token_cache()
+        token = cache.get(token_cache_key(key))
+        if token is None:
+            try:
+                token = await Token.objects.select_related('user').aget(key=key)
+            except Token.DoesNotExist:
+                raise exceptions.AuthenticationFailed(_('Invalid token.'))
+            if not token.user.is_active:
+                raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+            cache.set(token_cache_key(key), token)
+        return token.user, token
+
+# CachedTokenAuthentication: mesma validação do TokenAuthentication do DRF, mas o token (com o usuário já
+# carregado) fica no cache "auth" (LRU limitado por MAX_ENTRIES e com TIMEOUT). Na maior parte das
+# requisições autenticadas, a autenticação não faz nenhuma consulta ao banco.
+# Tokens inválidos e usuários inativos não entram no cache; a TokenAuthentication padrão responde 401.
+# aauthenticate / aauthenticate_credentials: a mesma validação para as views assíncronas (core/async_views.py),
+# com a consulta feita pelo ORM assíncrono. O cache é lido de forma síncrona: com o backend em memória
+# local a leitura é imediata e não vale uma troca de thread.
+
+
+def authenticate_in_worker(request, **credentials):
+    try:
+        return authenticate(request, **credentials)
+    finally:
+        connections.close_all()
+
+# authenticate_in_worker: authenticate() do Django (AUTHENTICATION_BACKENDS, checagem de is_active do
+# ModelBackend e signal user_login_failed) para o login assíncrono, que o chama com
+# sync_to_async(thread_sensitive=False): o hash da senha roda numa thread do executor, sem ocupar o event loop nem
+# a thread única das views síncronas do ASGI. Essas threads não passam pelo fim de requisição do Django, então a
+# conexão aberta pela consulta do usuário é fechada (ou devolvida ao pool) aqui.
@@ -0,0 +1,42 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+def catalog_cache():
+    return caches[settings.CATALOG_CACHE_ALIAS]
+
+
+def version_key(model):
+    return f'catalog:version:{model._meta.label_lower}'
+
+
+def get_version(model):
+    cache = catalog_cache()
+    version = cache.get(version_key(model))
+    if version is None:
+        cache.add(version_key(model), time.time_ns(), timeout=None)
+        version = cache.get(version_key(model))
+    return version
+
+
+def bump_version(model):
+    cache = catalog_cache()
+    try:
+        cache.incr(version_key(model))
+    except ValueError:
+        cache.add(version_key(model), time.time_ns(), timeout=None)
+
+# Cada modelo de catálogo tem um contador de versão no cache, incrementado a cada save/delete
+# (ver core/signals.py). As respostas ficam guardadas sob a versão atual, então uma escrita invalida
+# exatamente os payloads daquele modelo. Se o contador for descartado pelo cache, ele recomeça de um
+# valor baseado no relógio, nunca reaproveitando uma versão antiga.
+
+
+def get_payload(model, key):
+    return catalog_cache().get(f'catalog:{model._meta.label_lower}:{get_version(model)}:{key}')
+
+
+def set_payload(model, key, payload):
+    catalog_cache().set(f'catalog:{model._meta.label_lower}:{get_version(model)}:{key}', payload)
@@ -0,0 +1,87 @@
+import csv
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.db.models import FilteredRelation, Q
+from rest_framework.utils.encoders import JSONEncoder
+
+from core import choices
+
+MEAL_COLUMNS = ['meal_id', 'date', 'meal_type', 'meal_type_name', 'item_id', 'food', 'value', 'unit', 'kcal']
+TRAINING_COLUMNS = ['training_id', 'date', 'name', 'item_id', 'exercise', 'muscle_group', 'repetitions', 'series',
+                    'rest_seconds']
+
+
+def meal_rows(meals, chunk_size=2000):
+    rows = meals.annotate(
+        item=FilteredRelation('mealfood', condition=Q(mealfood__active=True)),
+    ).order_by('date', 'id', 'item__id').values_list(
+        'id', 'date', 'meal_type', 'item__id', 'item__food__description', 'item__value', 'item__food__unit',
+        'item__food__value', 'item__food__total_kcal',
+    ).iterator(chunk_size=chunk_size)
+    for meal_id, date, meal_type, item_id, food, value, unit, food_value, food_kcal in rows:
+        kcal = None
+        if item_id is not None:
+            kcal = round(value / food_value * food_kcal, 2) if value > 0 and food_value > 0 else 0
+        yield dict(zip(MEAL_COLUMNS, [
+            meal_id, date, meal_type, choices.MEALS.get(meal_type), item_id, food, value,
+            choices.UNIT_MEASUREMENT.get(unit), kcal,
+        ]))
+
+
+def training_rows(trainings, chunk_size=2000):
+    rows = trainings.annotate(
+        item=FilteredRelation('trainingexercise', condition=Q(trainingexercise__active=True)),
+    ).order_by('date', 'id', 'item__id').values_list(
+        'id', 'date', 'name', 'item__id', 'item__exercise__name', 'item__exercise__muscle_group__name',
+        'item__repetitions', 'item__series', 'item__rest_time',
+    ).iterator(chunk_size=chunk_size)
+    for *row, rest_time in rows:
+        yield dict(zip(TRAINING_COLUMNS, [*row, int(rest_time.total_seconds()) if rest_time is not None else None]))
+
+# meal_rows / training_rows: uma linha por item (alimento da refeição ou exercício do treino), com os dados do
+# catálogo no mesmo SELECT. Refeições e treinos sem itens saem numa linha com as colunas do item vazias.
+# iterator(chunk_size) usa um cursor do lado do servidor no PostgreSQL, então só chunk_size linhas ficam em memória.
+
+
+class Echo:
+    def write(self, value):
+        return value
+
+
+def render_csv(columns, rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(columns)
+    for row in rows:
+        yield writer.writerow(row.values())
+
+
+def render_ndjson(columns, rows):
+    encoder = JSONEncoder(ensure_ascii=False)
+    for row in rows:
+        yield encoder.encode(row) + '\n'
+
+
+EXPORTS = {
+    'meals': (MEAL_COLUMNS, meal_rows),
+    'trainings': (TRAINING_COLUMNS, training_rows),
+}
+RENDERERS = {
+    'csv': (render_csv, 'text/csv; charset=utf-8'),
+    'ndjson': (render_ndjson, 'application/x-ndjson; charset=utf-8'),
+}
+
+# render_csv / render_ndjson: geram a resposta linha a linha, para uso com StreamingHttpResponse
+# (Echo é o "arquivo" do csv.writer, que só devolve a linha formatada). O NDJSON tem um objeto JSON por linha,
+# com datas no formato ISO, como no restante da API.
+
+
+async def aiterate(lines, chunk_lines=500):
+    lines = iter(lines)
+    next_chunk = sync_to_async(lambda: ''.join(islice(lines, chunk_lines)))
+    while chunk := await next_chunk():
+        yield chunk
+
+# aiterate: versão assíncrona das linhas para o ASGI. Um StreamingHttpResponse com iterador síncrono é consumido
+# inteiro (sync_to_async(list)) pelo handler ASGI antes do envio; aqui cada bloco de chunk_lines linhas é gerado
+# na thread síncrona (a mesma do cursor do banco) e enviado antes do próximo, mantendo a memória constante.
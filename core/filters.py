@@ -1,14 +1,54 @@
 
 from django_filters import rest_framework as filters
+from rest_framework.filters import OrderingFilter
+
 from core import models
 
+
+class StableOrderingFilter(OrderingFilter):
+    def get_ordering(self, request, queryset, view):
+        ordering = list(super().get_ordering(request, queryset, view) or [])
+        if ordering and ordering[-1].lstrip('-') != 'id':
+            ordering.append('-id' if ordering[0].startswith('-') else 'id')
+        return ordering
+
+# Ordenação via ?ordering= que sempre termina em id, para que a paginação por cursor
+# tenha uma chave de ordenação única mesmo quando o campo escolhido se repete.
+
+
 class TrainingFilter(filters.FilterSet):
-    name = filters.CharFilter(lookup_expr='unaccent__icontains')
+    name = filters.CharFilter(method='filter_name')
+    date_after = filters.DateFilter(field_name='date', lookup_expr='gte')
+    date_before = filters.DateFilter(field_name='date', lookup_expr='lte')
 
     class Meta:
         model = models.Training
         fields = ['name']
 
+    def filter_name(self, queryset, name, value):
+        return queryset.search(value)
+
+# name: busca sem acentos usando o índice trigram de Training (ver UnaccentSearchQuerySet.search).
+# date_after / date_before: período (inclusive), atendido pelo índice (usuário, data).
+
 
+class DailyNutritionFilter(filters.FilterSet):
+    date_after = filters.DateFilter(field_name='date', lookup_expr='gte')
+    date_before = filters.DateFilter(field_name='date', lookup_expr='lte')
+
+    class Meta:
+        model = models.DailyNutrition
+        fields = ['date']
+
+
+class FoodFilter(filters.FilterSet):
+    description = filters.CharFilter(method='filter_description')
+
+    class Meta:
+        model = models.Food
+        fields = ['description']
 
+    def filter_description(self, queryset, name, value):
+        return queryset.search(value)
 
+# description: busca sem acentos usando o índice trigram de Food (ver UnaccentSearchQuerySet.search).
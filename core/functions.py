@@ -0,0 +1,10 @@
+from django.db.models import CharField, Func
+
+
+class ImmutableUnaccent(Func):
+    function = 'immutable_unaccent'
+    output_field = CharField()
+
+# Chama a função immutable_unaccent criada na migração 0016_food_search.
+# O unaccent do PostgreSQL é STABLE e não pode ser usado em índices de expressão;
+# o wrapper IMMUTABLE permite indexar unaccent(...) com GIN/trigram.
@@ -0,0 +1,147 @@
+import contextlib
+import csv
+import unicodedata
+from itertools import islice
+
+from django.db import transaction
+
+from core import cache, choices, models, rollups
+
+FOOD_COLUMNS = {
+    'description': ['description', 'descricao', 'descricao dos alimentos', 'alimento', 'nome'],
+    'total_kcal': ['total_kcal', 'kcal', 'energia (kcal)', 'energia kcal', 'energia_kcal', 'calorias'],
+    'unit': ['unit', 'unidade'],
+    'value': ['value', 'quantidade', 'porcao', 'porcao (g)'],
+}
+
+# FOOD_COLUMNS: nomes aceitos no cabeçalho para cada campo de Food, comparados sem acentos e sem maiúsculas.
+# Cobre o formato da própria API e tabelas no estilo TACO ("Descrição dos alimentos", "Energia (kcal)").
+# Sem as colunas de unidade e quantidade, os valores são por 100 g, como na TACO.
+
+UNITS = {label.lower(): unit for unit, label in choices.UNIT_MEASUREMENT.items()}
+TRACE_VALUES = {'tr', 'traco', '*'}
+
+
+def normalize(text):
+    text = unicodedata.normalize('NFKD', text.strip().lower())
+    return ''.join(char for char in text if not unicodedata.combining(char))
+
+
+def parse_number(text):
+    text = text.strip()
+    if normalize(text) in TRACE_VALUES:
+        return 0.0
+    return float(text.replace('.', '').replace(',', '.') if ',' in text else text)
+
+
+def read_foods(lines):
+    sample = next(lines, '')
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+    except csv.Error:
+        dialect = csv.excel
+    header = [normalize(column) for column in next(csv.reader([sample], dialect))]
+    positions = {
+        field: next((header.index(alias) for alias in aliases if alias in header), None)
+        for field, aliases in FOOD_COLUMNS.items()
+    }
+    if positions['description'] is None or positions['total_kcal'] is None:
+        raise ValueError('O cabeçalho precisa das colunas de descrição e de calorias (ex.: description,total_kcal).')
+
+    for line, row in enumerate(csv.reader(lines, dialect), start=2):
+        if not any(cell.strip() for cell in row):
+            continue
+        try:
+            values = {field: row[position] for field, position in positions.items() if position is not None}
+            unit = values.get('unit', '').strip()
+            food = {
+                'description': ' '.join(values['description'].split())[:300],
+                'total_kcal': parse_number(values['total_kcal']),
+                'unit': UNITS[unit.lower()] if unit.lower() in UNITS else int(unit or choices.GRAM),
+                'value': parse_number(values['value']) if values.get('value', '').strip() else 100.0,
+            }
+        except (IndexError, KeyError, ValueError):
+            yield {'line': line, 'invalid': row}
+            continue
+        if not food['description'] or food['unit'] not in choices.UNIT_MEASUREMENT:
+            yield {'line': line, 'invalid': row}
+            continue
+        yield food
+
+# read_foods: lê o CSV linha a linha (o delimitador , ; ou tab é detectado pelo cabeçalho) e devolve um dicionário
+# por alimento. Aceita vírgula decimal e "Tr" (traço) como zero. Linhas inválidas saem como {line, invalid}.
+
+
+def import_foods(foods, chunk_size=1000, dry_run=False, report=None, atomic=False):
+    summary = {'created': 0, 'updated': 0, 'unchanged': 0, 'invalid': 0}
+    fields = ['total_kcal', 'unit', 'value', 'active']
+    foods = iter(foods)
+    written = False
+    try:
+        with transaction.atomic() if atomic else contextlib.nullcontext():
+            while chunk := list(islice(foods, chunk_size)):
+                written |= import_chunk(chunk, fields, summary, dry_run, report)
+    finally:
+        if written:
+            cache.bump_version(models.Food)
+    return summary
+
+
+def import_chunk(chunk, fields, summary, dry_run, report):
+    incoming = {}
+    for food in chunk:
+        if 'invalid' in food:
+            summary['invalid'] += 1
+            if report:
+                report({'action': 'invalid', **food})
+        else:
+            incoming[food['description']] = food
+    existing = {
+        food.description: food
+        for food in models.Food.objects.filter(description__in=incoming)
+    }
+    upserts, nutrition_changed = [], []
+    for description, food in incoming.items():
+        food = {**food, 'active': True}
+        current = existing.get(description)
+        before = current and {field: getattr(current, field) for field in fields}
+        if before == {field: food[field] for field in fields}:
+            summary['unchanged'] += 1
+            continue
+        action = 'updated' if current else 'created'
+        summary[action] += 1
+        if report:
+            report({'action': action, 'description': description, 'before': before,
+                    'after': {field: food[field] for field in fields}})
+        upserts.append(models.Food(**food))
+        if current and (current.total_kcal, current.value) != (food['total_kcal'], food['value']):
+            nutrition_changed.append(current.pk)
+
+    if dry_run or not upserts:
+        return False
+    with transaction.atomic():
+        models.Food.objects.bulk_create(
+            upserts,
+            update_conflicts=True,
+            unique_fields=['description'],
+            update_fields=[*fields, 'modified_at'],
+        )
+        if nutrition_changed:
+            rollups.refresh_meals(
+                models.MealFood.objects.filter(food_id__in=nutrition_changed).values('meal_id')
+            )
+    return True
+
+# import_foods: consome as linhas em lotes de chunk_size (um SELECT e um INSERT ... ON CONFLICT (descrição) por
+# lote), então a memória não depende do tamanho do arquivo. Cada lote é gravado na sua própria transação: um erro
+# no meio mantém os lotes anteriores, e o resumo conta só o que foi processado até ali. Com atomic=True, o arquivo
+# inteiro roda numa transação (tudo ou nada), ao custo de uma transação longa em arquivos grandes.
+# Descrições repetidas dentro de um lote contam uma vez (vale a última linha); repetidas em lotes diferentes são
+# comparadas com o que o lote anterior gravou (ou, com dry_run, contadas de novo).
+# Alimentos iguais aos do banco não são regravados; um alimento inativo com a mesma descrição é reativado.
+# Com dry_run, nada é gravado e só o resumo é calculado.
+# report(change) recebe cada criação/alteração ({action, description, before, after}), para mostrar a diferença,
+# e cada linha inválida ({action: 'invalid', line, invalid}), que é contada e ignorada.
+# Como bulk_create não dispara signals, os totais das refeições que usam alimentos com calorias ou quantidade
+# alteradas são recalculados aqui, e o cache do catálogo é invalidado ao final (também após um erro, se algum
+# lote já tinha sido gravado).
@@ -0,0 +1,206 @@
+import datetime
+import json
+import re
+import statistics
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.urls import URLPattern
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from core import models, urls
+from core.management.commands.generate_data import PREFIX
+
+ROUTE_PARAMS = {
+    'meal/daily-summary/': lambda day: {'from': day - datetime.timedelta(days=30), 'to': day},
+    'async/meal/daily-summary/': lambda day: {'from': day - datetime.timedelta(days=30), 'to': day},
+    'food/search/': lambda day: {'q': 'arroz'},
+    'sync/': lambda day: {'since': timezone.now() - datetime.timedelta(minutes=5)},
+}
+
+# ROUTE_PARAMS: parâmetros obrigatórios (ou representativos) de algumas rotas, a partir do último dia com refeições.
+# O sync pede as alterações dos últimos 5 minutos, como um cliente que sincroniza com frequência.
+
+
+def client(token):
+    host = next((host for host in settings.ALLOWED_HOSTS if host != '*'), 'localhost').lstrip('.')
+    return Client(HTTP_HOST=host, HTTP_AUTHORIZATION=f'Token {token}')
+
+# client: o Client de teste usa o Host testserver, recusado (DisallowedHost) no perfil prod; as requisições usam
+# o primeiro host de ALLOWED_HOSTS (ou localhost, quando é '*'), como faria um cliente real.
+
+
+def get_routes():
+    routes = []
+    for pattern in urls.urlpatterns:
+        if not isinstance(pattern, URLPattern) or 'format' in pattern.pattern.regex.groupindex:
+            continue
+        callback = pattern.callback
+        actions = getattr(callback, 'actions', None)
+        if actions is not None:
+            if 'get' not in actions:
+                continue
+            name = f'{callback.cls.__name__}.{actions["get"]}'
+        elif hasattr(getattr(callback, 'view_class', None), 'get'):
+            name = f'{callback.view_class.__name__}.get'
+        else:
+            continue
+        route = str(pattern.pattern).lstrip('^').rstrip('$')
+        routes.append((name, re.sub(r'\(\?P<(\w+)>[^)]*\)', r'<\1>', route)))
+    return routes
+
+# get_routes: todas as rotas GET de core/urls.py (router do DRF e views assíncronas), sem as variantes .json.
+# As rotas de detalhe aparecem como meal/<pk>/.
+
+
+def percentile(values, fraction):
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=settings.BASE_DIR).stdout.strip() or None
+    except OSError:
+        return None
+
+
+class Command(BaseCommand):
+    help = 'Mede vazão, latência (p50/p99) e consultas por requisição de todas as rotas GET de core/urls.py.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username', help=f'Usuário das requisições (padrão: o primeiro {PREFIX}*).')
+        parser.add_argument('--requests', type=int, default=50, help='Requisições por rota.')
+        parser.add_argument('--concurrency', type=int, default=1, help='Clientes simultâneos.')
+        parser.add_argument('--route', action='append', help='Mede apenas as rotas que contêm esse texto.')
+        parser.add_argument('--output', help='Grava o relatório JSON nesse arquivo.')
+        parser.add_argument('--compare', help='Relatório JSON anterior para comparar.')
+        parser.add_argument('--tolerance', type=float, default=0.2,
+                            help='Aumento relativo de p50 tolerado na comparação (padrão 20%%).')
+        parser.add_argument('--fail-on-regression', action='store_true',
+                            help='Termina com erro se houver regressão em relação a --compare.')
+
+    def handle(self, *args, **options):
+        user = self.get_user(options['username'])
+        token = Token.objects.get_or_create(user=user)[0].key
+        last_day = models.Meal.active_objects.filter(user=user).order_by('-date').values_list('date', flat=True)
+        last_day = last_day.first() or datetime.date.today()
+        connection.close()
+
+        results = []
+        for name, route in get_routes():
+            if options['route'] and not any(text in route for text in options['route']):
+                continue
+            path = self.resolve_path(route, token, last_day)
+            if path is None:
+                self.stderr.write(f'{name}: sem registro para a rota de detalhe {route}, ignorada.')
+                continue
+            result = self.measure(path, token, options)
+            if result['status'] != [200]:
+                self.stderr.write(f'{name}: respostas {result["status"]} em {path}.')
+            results.append({'view': name, 'route': f'/api/{route}', **result})
+
+        report = {
+            'generated_at': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'revision': git_revision(),
+            'settings': {'DJANGO_ENV': settings.DJANGO_ENV, 'DEBUG': settings.DEBUG},
+            'user': user.username,
+            'requests': options['requests'],
+            'concurrency': options['concurrency'],
+            'results': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                json.dump(report, file, indent=2, default=str)
+
+        self.stdout.write(f'{"rota":<46}{"req/s":>8}{"p50 (ms)":>10}{"p99 (ms)":>10}{"consultas":>11}')
+        for row in results:
+            self.stdout.write(f'{row["route"]:<46}{row["rps"]:>8.1f}{row["p50_ms"]:>10.1f}'
+                              f'{row["p99_ms"]:>10.1f}{row["queries"]:>11}')
+
+        if options['compare']:
+            regressions = self.compare(options['compare'], results, options['tolerance'])
+            if regressions and options['fail_on_regression']:
+                raise CommandError(f'{len(regressions)} regressão(ões) em relação a {options["compare"]}.')
+
+    def get_user(self, username):
+        users = User.objects.filter(username=username) if username else \
+            User.objects.filter(username__startswith=PREFIX).order_by('id')
+        user = users.first()
+        if user is None:
+            raise CommandError('Usuário não encontrado. Gere dados com: python manage.py generate_data')
+        return user
+
+    def resolve_path(self, route, token, last_day):
+        params = ROUTE_PARAMS.get(route, lambda day: {})(last_day)
+        if '<pk>' not in route:
+            return f'/api/{route}' + (f'?{urlencode(params)}' if params else '')
+
+        list_route = route[:route.index('<pk>')]
+        response = client(token).get(f'/api/{list_route}')
+        data = response.json() if response.status_code == 200 else []
+        rows = data['results'] if isinstance(data, dict) else data
+        if not rows:
+            return None
+        return '/api/' + route.replace('<pk>', str(rows[0]['id']))
+
+    def measure(self, path, token, options):
+        def call(_):
+            api = client(token)
+            started = time.perf_counter()
+            response = api.get(path)
+            elapsed = time.perf_counter() - started
+            queries = re.search(r'db;desc="(\d+) queries"', response.get('Server-Timing', ''))
+            return response.status_code, elapsed, int(queries.group(1)) if queries else None
+
+        call(None)
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            calls = list(pool.map(call, range(options['requests'])))
+        elapsed = time.perf_counter() - started
+
+        latencies = sorted(latency for _, latency, _ in calls)
+        queries = [count for _, _, count in calls if count is not None]
+        return {
+            'path': path,
+            'status': sorted({status for status, _, _ in calls}),
+            'rps': round(len(calls) / elapsed, 1),
+            'p50_ms': round(statistics.median(latencies) * 1000, 2),
+            'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+            'queries': max(queries) if queries else None,
+        }
+
+    def compare(self, path, results, tolerance):
+        with open(path) as file:
+            previous = {row['route']: row for row in json.load(file)['results']}
+        regressions = []
+        self.stdout.write(f'\nComparação com {path}:')
+        for row in results:
+            before = previous.get(row['route'])
+            if before is None:
+                continue
+            problems = []
+            if before['p50_ms'] and row['p50_ms'] > before['p50_ms'] * (1 + tolerance):
+                problems.append(f'p50 {before["p50_ms"]} -> {row["p50_ms"]} ms')
+            if before['queries'] is not None and row['queries'] is not None and row['queries'] > before['queries']:
+                problems.append(f'consultas {before["queries"]} -> {row["queries"]}')
+            if problems:
+                regressions.append(row['route'])
+                self.stdout.write(f'  REGRESSÃO {row["route"]}: {"; ".join(problems)}')
+        if not regressions:
+            self.stdout.write('  nenhuma regressão.')
+        return regressions
+
+# Cada rota é chamada --requests vezes (após uma chamada de aquecimento) pelo cliente de teste do Django, passando por
+# todo o middleware; a quantidade de consultas vem do cabeçalho Server-Timing (InstrumentationMiddleware).
+# Rotas de detalhe usam o primeiro registro da listagem correspondente.
+# --output grava um relatório JSON (revisão do git, perfil de settings e resultados por rota); com --compare, as rotas
+# cujo p50 piorou além de --tolerance ou cuja quantidade de consultas aumentou são apontadas como regressão.
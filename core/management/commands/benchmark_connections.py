@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.management.commands.load_test import load_test_subprocess
+
+CONFIGS = [
+    ('sem reuso', {'DB_CONN_MAX_AGE': '0', 'DB_POOL': 'false'}),
+    ('persistente', {'DB_CONN_MAX_AGE': '60', 'DB_POOL': 'false'}),
+    ('pool', {'DB_POOL': 'true'}),
+]
+
+# CONFIGS: configurações de conexão comparadas, aplicadas pelas mesmas variáveis DB_* do settings.
+
+
+class Command(BaseCommand):
+    help = 'Compara a vazão das requisições com conexão nova por requisição, conexões persistentes e pool.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', default='1,8,32', help='Níveis de concorrência separados por vírgula.')
+        parser.add_argument('--requests', type=int, default=300, help='Requisições por medição.')
+        parser.add_argument('--endpoint', default='userprofile.me', help='Endpoint do load_test usado na medição.')
+        parser.add_argument('--mode', default='wsgi', choices=['wsgi', 'asgi', 'asgi-async'])
+
+    def handle(self, *args, **options):
+        if settings.DATABASES['default']['ENGINE'] != 'django.db.backends.postgresql':
+            raise CommandError('O benchmark de conexões precisa de DB_ENGINE=django.db.backends.postgresql.')
+
+        rows = []
+        for name, env in CONFIGS:
+            try:
+                results = load_test_subprocess(env, options['concurrency'], options['requests'],
+                                               options['endpoint'], options['mode'])
+            except CommandError as exc:
+                raise CommandError(f'{name}: {exc}')
+            rows += [{'config': name, **row} for row in results]
+
+        self.stdout.write(f'{options["endpoint"]} ({options["mode"]})')
+        self.stdout.write(f'{"conexões":<14}{"conc.":>6}{"req/s":>9}{"p50 (ms)":>10}{"p99 (ms)":>10}')
+        for row in rows:
+            self.stdout.write(f'{row["config"]:<14}{row["concurrency"]:>6}{row["rps"]:>9.1f}'
+                              f'{row["p50_ms"]:>10.1f}{row["p99_ms"]:>10.1f}')
+
+# Cada configuração roda o load_test num processo separado (as opções de conexão são lidas na inicialização),
+# contra o PostgreSQL configurado nas variáveis DB_*.
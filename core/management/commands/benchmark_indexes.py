@@ -0,0 +1,159 @@
+import datetime
+import json
+import statistics
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from core import models
+
+BASELINE_SQL = [
+    'CREATE INDEX bench_meal_user ON meal (nb_user)',
+    'CREATE INDEX bench_training_user ON training (nb_user)',
+    'CREATE INDEX bench_meal_food_meal ON meal_food (nb_meal)',
+    'CREATE INDEX bench_training_exercise_training ON training_exercise (tx_training)',
+    'DROP INDEX meal_active_user_date_idx',
+    'DROP INDEX meal_user_modified_idx',
+    'DROP INDEX training_active_user_date_idx',
+    'DROP INDEX training_user_modified_idx',
+    'DROP INDEX meal_food_meal_idx',
+    'DROP INDEX training_exercise_training_idx',
+]
+
+# BASELINE_SQL: volta temporariamente ao esquema anterior às migrações 0018/0019 (apenas índices simples nas FKs).
+# É executado dentro de uma transação que sempre sofre rollback.
+
+GENERATE_SQL = [
+    """
+    INSERT INTO auth_user (password, is_superuser, username, first_name, last_name, email, is_staff, is_active, date_joined)
+    SELECT '!', FALSE, 'bench_' || g, '', '', '', FALSE, TRUE, NOW()
+    FROM generate_series(1, %(users)s) g
+    ON CONFLICT (username) DO NOTHING
+    """,
+    """
+    INSERT INTO meal (dt_created_at, dt_modified_at, cs_active, nb_user, tx_date, meal_type, nb_total_kcal)
+    SELECT NOW(), NOW(), TRUE, u.id, %(start)s::date - (g / 4), g %% 4 + 1, 0
+    FROM auth_user u CROSS JOIN generate_series(0, %(meals_per_user)s - 1) g
+    WHERE u.username LIKE 'bench\\_%%'
+    """,
+    """
+    INSERT INTO meal_food (dt_created_at, dt_modified_at, cs_active, nb_meal, nb_food, nb_value)
+    SELECT NOW(), NOW(), TRUE, m.id, f.ids[1 + floor(random() * array_length(f.ids, 1))::int], 50 + random() * 150
+    FROM meal m
+    INNER JOIN auth_user u ON u.id = m.nb_user AND u.username LIKE 'bench\\_%%'
+    CROSS JOIN (SELECT array_agg(id) AS ids FROM food) f
+    CROSS JOIN generate_series(1, %(items_per_meal)s)
+    """,
+    """
+    INSERT INTO training (dt_created_at, dt_modified_at, cs_active, nb_user, tx_name, date)
+    SELECT NOW(), NOW(), TRUE, u.id, 'Treino ' || (g %% 5), %(start)s::date - g
+    FROM auth_user u CROSS JOIN generate_series(0, %(trainings_per_user)s - 1) g
+    WHERE u.username LIKE 'bench\\_%%'
+    """,
+    """
+    INSERT INTO training_exercise (dt_created_at, dt_modified_at, cs_active, tx_training, tx_exercise,
+                                   nb_repetitions, nb_series, nb_rest_time)
+    SELECT NOW(), NOW(), TRUE, t.id, e.ids[1 + floor(random() * array_length(e.ids, 1))::int], 12, 4, INTERVAL '60 seconds'
+    FROM training t
+    INNER JOIN auth_user u ON u.id = t.nb_user AND u.username LIKE 'bench\\_%%'
+    CROSS JOIN (SELECT array_agg(id) AS ids FROM exercise) e
+    CROSS JOIN generate_series(1, 6)
+    """,
+    'ANALYZE auth_user, meal, meal_food, training, training_exercise',
+]
+
+# GENERATE_SQL: gera os dados sintéticos direto no banco (generate_series), sem passar pelo ORM,
+# para chegar em milhões de linhas de meal_food em poucos minutos.
+
+
+def hot_paths(user_id, start):
+    month = (start - datetime.timedelta(days=30), start)
+    return {
+        'training.list': models.Training.active_objects.filter(user_id=user_id).order_by('-date', '-id')[:50],
+        'training.date_range': models.Training.active_objects.filter(user_id=user_id, date__range=month),
+        'meal.list': models.Meal.active_objects.filter(user_id=user_id).with_total_calories().order_by('-date', '-id')[:50],
+        'meal.date_range': models.Meal.active_objects.filter(user_id=user_id, date__range=month).with_total_calories(),
+        'meal_food.by_meal': models.MealFood.active_objects.filter(
+            meal__in=models.Meal.active_objects.filter(user_id=user_id, date__range=month)
+        ).select_related('food'),
+        'training_exercise.by_training': models.TrainingExercise.active_objects.filter(
+            training__in=models.Training.active_objects.filter(user_id=user_id, date__range=month)
+        ).select_related('exercise'),
+    }
+
+# hot_paths: consultas por usuário usadas pelas listagens e filtros da API.
+
+
+class Command(BaseCommand):
+    help = 'Mede as consultas por usuário (EXPLAIN ANALYZE) com e sem os índices compostos/parciais (0018 e 0019).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--generate', type=int, default=0,
+                            help='Gera aproximadamente esse número de linhas em meal_food antes de medir.')
+        parser.add_argument('--users', type=int, default=1000, help='Usuários sintéticos gerados.')
+        parser.add_argument('--samples', type=int, default=20, help='Usuários sorteados para cada consulta.')
+        parser.add_argument('--compare', action='store_true',
+                            help='Mede também o esquema anterior (índices simples), em transação desfeita ao final.')
+
+    def handle(self, *args, **options):
+        start = datetime.date.today()
+
+        if options['generate']:
+            self.generate(options['generate'], options['users'], start)
+
+        user_ids = self.sample_users(options['samples'])
+        if not user_ids:
+            raise CommandError('Nenhuma refeição encontrada. Use --generate para criar dados sintéticos.')
+
+        current = self.measure(user_ids, start)
+        baseline = None
+        if options['compare']:
+            with transaction.atomic():
+                with connection.cursor() as cursor:
+                    for sql in BASELINE_SQL:
+                        cursor.execute(sql)
+                baseline = self.measure(user_ids, start)
+                transaction.set_rollback(True)
+
+        self.stdout.write(f'{"consulta":<32}{"antes (ms)":>12}{"depois (ms)":>14}{"ganho":>9}')
+        for name, elapsed in current.items():
+            before = baseline[name] if baseline else None
+            self.stdout.write(
+                f'{name:<32}'
+                f'{before if before is not None else "-":>12}'
+                f'{elapsed:>14}'
+                f'{f"{before / elapsed:.1f}x" if before and elapsed else "-":>9}'
+            )
+
+    def sample_users(self, samples):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT nb_user FROM meal TABLESAMPLE SYSTEM (1) LIMIT %s', [samples])
+            user_ids = {row[0] for row in cursor.fetchall()}
+        if not user_ids:
+            user_ids = set(models.Meal.objects.values_list('user_id', flat=True)[:samples])
+        return sorted(user_ids)
+
+    def generate(self, rows, users, start):
+        items_per_meal = 5
+        meals_per_user = max(rows // (users * items_per_meal), 1)
+        params = {
+            'users': users,
+            'start': start,
+            'meals_per_user': meals_per_user,
+            'items_per_meal': items_per_meal,
+            'trainings_per_user': max(meals_per_user // 8, 1),
+        }
+        with transaction.atomic(), connection.cursor() as cursor:
+            for sql in GENERATE_SQL:
+                cursor.execute(sql, params)
+        self.stdout.write(f'{users * meals_per_user * items_per_meal} linhas geradas em meal_food.')
+
+    def measure(self, user_ids, start):
+        timings = {}
+        for user_id in user_ids:
+            for name, queryset in hot_paths(user_id, start).items():
+                plan = json.loads(queryset.explain(analyze=True, format='json'))
+                timings.setdefault(name, []).append(plan[0]['Execution Time'])
+        return {name: round(statistics.median(values), 3) for name, values in timings.items()}
+
+# measure: mediana do tempo de execução (EXPLAIN ANALYZE) de cada consulta entre os usuários sorteados.
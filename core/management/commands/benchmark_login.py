@@ -0,0 +1,136 @@
+import asyncio
+import json
+import os
+import statistics
+import threading
+import time
+
+from django.contrib.auth.models import User
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management.base import BaseCommand
+from django.db import connection
+from rest_framework.authtoken.views import ObtainAuthToken
+from rest_framework.test import APIRequestFactory
+
+from core import metrics
+from core.viewsets import UserLogIn
+
+USERNAME = 'bench_login@dailyfit.com'
+PASSWORD = 'bench-login-senha'
+
+
+class Command(BaseCommand):
+    help = 'Mede logins por segundo (e por núcleo) em POST /api-user-login/ (WSGI e ASGI) e /api/async/login/.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=(os.cpu_count() or 1) * 2,
+                            help='Requisições de login simultâneas.')
+        parser.add_argument('--seconds', type=float, default=5, help='Duração de cada medição.')
+        parser.add_argument('--compare', action='store_true',
+                            help='Mede também o ObtainAuthToken padrão do DRF (authenticate + get_or_create).')
+
+    def handle(self, *args, **options):
+        cores = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count()
+        user = User.objects.create_user(username=USERNAME, password=PASSWORD)
+        try:
+            views = {'UserLogIn': UserLogIn.as_view()}
+            if options['compare']:
+                views['ObtainAuthToken'] = ObtainAuthToken.as_view()
+
+            self.stdout.write(f'{options["threads"]} requisições simultâneas, {cores} núcleo(s)')
+            self.stdout.write(f'{"view":<18}{"logins/s":>10}{"por núcleo":>12}{"p50 (ms)":>10}{"p95 (ms)":>10}')
+            runs = {name: lambda view=view: self.run(view, options['threads'], options['seconds'])
+                    for name, view in views.items()}
+            application = ASGIHandler()
+            for name, path in [('UserLogIn ASGI', '/api-user-login/'), ('LogInView ASGI', '/api/async/login/')]:
+                runs[name] = lambda path=path: asyncio.run(
+                    self.run_asgi(application, path, options['threads'], options['seconds'])
+                )
+            for name, run in runs.items():
+                latencies = run()
+                rate = len(latencies) / options['seconds']
+                latencies.sort()
+                self.stdout.write(
+                    f'{name:<18}{rate:>10.1f}{rate / cores:>12.1f}'
+                    f'{statistics.median(latencies) * 1000:>10.1f}'
+                    f'{latencies[int(len(latencies) * 0.95)] * 1000:>10.1f}'
+                )
+
+            authenticates = metrics.snapshot().get('login.authenticate_seconds')
+            if authenticates:
+                self.stdout.write(
+                    f'authenticate médio: {authenticates["sum"] / authenticates["count"] * 1000:.1f} ms'
+                )
+        finally:
+            user.delete()
+
+    def run(self, view, threads, seconds):
+        factory = APIRequestFactory()
+        deadline = time.perf_counter() + seconds
+        latencies = []
+        lock = threading.Lock()
+
+        def worker():
+            try:
+                while time.perf_counter() < deadline:
+                    request = factory.post('/api-user-login/', {'username': USERNAME, 'password': PASSWORD})
+                    started = time.perf_counter()
+                    response = view(request)
+                    elapsed = time.perf_counter() - started
+                    if response.status_code != 200:
+                        raise RuntimeError(f'login falhou: {response.status_code} {response.data}')
+                    with lock:
+                        latencies.append(elapsed)
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=worker) for _ in range(threads)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        return latencies
+
+    async def run_asgi(self, application, path, clients, seconds):
+        body = json.dumps({'username': USERNAME, 'password': PASSWORD}).encode()
+        headers = [(b'host', b'localhost'), (b'content-type', b'application/json'),
+                   (b'content-length', str(len(body)).encode())]
+        deadline = time.perf_counter() + seconds
+        latencies = []
+
+        async def login():
+            scope = {'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'POST',
+                     'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'query_string': b'',
+                     'root_path': '', 'headers': headers, 'client': ('127.0.0.1', 0), 'server': ('localhost', 80)}
+            body_sent = asyncio.Event()
+            statuses = []
+
+            async def receive():
+                if not body_sent.is_set():
+                    body_sent.set()
+                    return {'type': 'http.request', 'body': body, 'more_body': False}
+                await asyncio.Future()
+
+            async def send(message):
+                if message['type'] == 'http.response.start':
+                    statuses.append(message['status'])
+
+            await application(scope, receive, send)
+            if statuses[0] != 200:
+                raise RuntimeError(f'login falhou: {statuses[0]} em {path}')
+
+        async def client():
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                await login()
+                latencies.append(time.perf_counter() - started)
+
+        await asyncio.gather(*(client() for _ in range(clients)))
+        return latencies
+
+# Cada thread simula um cliente fazendo logins em sequência durante --seconds; o resultado é a taxa total,
+# a taxa por núcleo disponível e a latência (p50/p95) de cada login.
+# run_asgi: os mesmos clientes como tarefas no event loop, chamando o handler ASGI direto (sem rede), no login
+# síncrono (UserLogIn ASGI, que sob ASGI roda na única thread das views síncronas e atende um login por vez) e no
+# assíncrono (LogInView ASGI, que roda o authenticate() em threads do executor e atende vários logins ao mesmo
+# tempo).
@@ -0,0 +1,43 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.utils import get_random_secret_key
+
+from core.management.commands.load_test import ENDPOINTS, load_test_subprocess
+
+
+class Command(BaseCommand):
+    help = 'Compara a latência por requisição dos perfis de settings dev e prod (DJANGO_ENV).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=300, help='Requisições por medição.')
+        parser.add_argument('--concurrency', default='1', help='Níveis de concorrência separados por vírgula.')
+        parser.add_argument('--mode', default='wsgi', choices=['wsgi', 'asgi', 'asgi-async'])
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'{"endpoint":<20}{"conc.":>6}{"dev p50":>10}{"prod p50":>10}'
+                          f'{"economia (ms)":>15}{"dev req/s":>11}{"prod req/s":>12}')
+        prod_env = {
+            'DJANGO_SECRET_KEY': os.environ.get('DJANGO_SECRET_KEY') or get_random_secret_key(),
+            'DJANGO_ALLOWED_HOSTS': os.environ.get('DJANGO_ALLOWED_HOSTS') or 'localhost',
+        }
+        for name, *_ in ENDPOINTS:
+            profiles = {}
+            for profile in ('dev', 'prod'):
+                env = {'DJANGO_ENV': profile, **(prod_env if profile == 'prod' else {})}
+                try:
+                    profiles[profile] = load_test_subprocess(
+                        env, options['concurrency'], options['requests'], name, options['mode'],
+                    )
+                except CommandError as exc:
+                    raise CommandError(f'{profile}: {exc}')
+            for dev, prod in zip(profiles['dev'], profiles['prod']):
+                self.stdout.write(
+                    f'{name:<20}{dev["concurrency"]:>6}{dev["p50_ms"]:>10.2f}{prod["p50_ms"]:>10.2f}'
+                    f'{dev["p50_ms"] - prod["p50_ms"]:>15.2f}{dev["rps"]:>11.1f}{prod["rps"]:>12.1f}'
+                )
+
+# Roda o load_test de cada endpoint com DJANGO_ENV=dev e DJANGO_ENV=prod (processos separados) e mostra
+# a economia por requisição (diferença das medianas) e a vazão de cada perfil.
+# O perfil prod exige DJANGO_SECRET_KEY e DJANGO_ALLOWED_HOSTS; sem elas no ambiente, a medição usa uma chave
+# aleatória e o Host localhost das requisições do load_test.
@@ -0,0 +1,122 @@
+import datetime
+import random
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from rest_framework.authtoken.models import Token
+
+from core import choices, models, rollups
+
+PREFIX = 'synthetic_'
+
+DAILY_MEALS = [choices.CAFE_MANHA, choices.ALMOCO, choices.LANCHE_TARDE, choices.JANTAR]
+EXTRA_MEALS = [choices.LANCHE_MANHA, choices.CEIA, choices.PRE_TREINO, choices.POS_TREINO]
+TRAINING_NAMES = ['Treino A - Peito e Tríceps', 'Treino B - Costas e Bíceps', 'Treino C - Pernas',
+                  'Treino D - Ombros e Abdômen', 'Treino Full Body']
+
+
+class Command(BaseCommand):
+    help = 'Gera usuários sintéticos com histórico de treinos e refeições sobre os catálogos da migração 0014.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100, help='Quantidade de usuários gerados.')
+        parser.add_argument('--months', type=int, default=6, help='Meses de histórico por usuário.')
+        parser.add_argument('--trainings-per-week', type=int, default=4)
+        parser.add_argument('--items-per-meal', type=int, default=4, help='Média de alimentos por refeição.')
+        parser.add_argument('--batch-users', type=int, default=20, help='Usuários gravados por transação.')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--clear', action='store_true', help='Remove os usuários sintéticos antes de gerar.')
+
+    def handle(self, *args, **options):
+        foods = list(models.Food.active_objects.values_list('id', flat=True))
+        exercises = list(models.Exercise.active_objects.values_list('id', flat=True))
+        if not foods or not exercises:
+            raise CommandError('Catálogos vazios: aplique as migrações (0014_dados_banco) antes de gerar dados.')
+
+        if options['clear']:
+            deleted = User.objects.filter(username__startswith=PREFIX).delete()[1].get('auth.User', 0)
+            self.stdout.write(f'{deleted} usuários sintéticos removidos.')
+
+        rng = random.Random(options['seed'])
+        end = datetime.date.today()
+        start = end - datetime.timedelta(days=30 * options['months'])
+        first = User.objects.filter(username__startswith=PREFIX).count()
+        totals = dict.fromkeys(['users', 'meals', 'meal_foods', 'trainings', 'training_exercises'], 0)
+
+        for offset in range(0, options['users'], options['batch_users']):
+            batch = range(first + offset, first + min(offset + options['batch_users'], options['users']))
+            with transaction.atomic():
+                created = self.generate_batch(batch, rng, start, end, foods, exercises, options)
+            for key, value in created.items():
+                totals[key] += value
+            self.stdout.write(f'{totals["users"]}/{options["users"]} usuários...')
+
+        rollups.rebuild()
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE auth_user, meal, meal_food, training, training_exercise, daily_nutrition')
+        self.stdout.write(', '.join(f'{key}: {value}' for key, value in totals.items()))
+
+    def generate_batch(self, batch, rng, start, end, foods, exercises, options):
+        users = User.objects.bulk_create(
+            User(username=f'{PREFIX}{index}@dailyfit.com', email=f'{PREFIX}{index}@dailyfit.com',
+                 first_name='Usuário', last_name=f'Sintético {index}', password='!')
+            for index in batch
+        )
+        Token.objects.bulk_create(Token(user=user, key=Token.generate_key()) for user in users)
+        models.UserProfile.objects.bulk_create(
+            models.UserProfile(login=user, age=rng.randint(18, 65), weight=round(rng.uniform(50, 110), 1),
+                               height=round(rng.uniform(1.5, 1.95), 2))
+            for user in users
+        )
+
+        days = [start + datetime.timedelta(days=day) for day in range((end - start).days + 1)]
+        meals = models.Meal.objects.bulk_create(
+            (
+                models.Meal(user=user, date=day, meal_type=meal_type)
+                for user in users
+                for day in days
+                for meal_type in DAILY_MEALS + rng.sample(EXTRA_MEALS, rng.randint(0, 2))
+            ),
+            batch_size=5000,
+        )
+        meal_foods = models.MealFood.objects.bulk_create(
+            (
+                models.MealFood(meal=meal, food_id=rng.choice(foods), value=round(rng.uniform(30, 300)))
+                for meal in meals
+                for _ in range(max(1, round(rng.gauss(options['items_per_meal'], 1))))
+            ),
+            batch_size=5000,
+        )
+
+        trainings = models.Training.objects.bulk_create(
+            (
+                models.Training(user=user, name=rng.choice(TRAINING_NAMES), date=day)
+                for user in users
+                for day in days
+                if rng.random() < options['trainings_per_week'] / 7
+            ),
+            batch_size=5000,
+        )
+        training_exercises = models.TrainingExercise.objects.bulk_create(
+            (
+                models.TrainingExercise(
+                    training=training,
+                    exercise_id=exercise,
+                    repetitions=rng.choice([8, 10, 12, 15]),
+                    series=rng.choice([3, 4]),
+                    rest_time=datetime.timedelta(seconds=rng.choice([45, 60, 90])),
+                )
+                for training in trainings
+                for exercise in rng.sample(exercises, min(len(exercises), rng.randint(4, 8)))
+            ),
+            batch_size=5000,
+        )
+        return {'users': len(users), 'meals': len(meals), 'meal_foods': len(meal_foods),
+                'trainings': len(trainings), 'training_exercises': len(training_exercises)}
+
+# Gera, para cada usuário sintético (synthetic_<n>@dailyfit.com), perfil, token, 4 a 6 refeições por dia com
+# alimentos sorteados do catálogo e cerca de --trainings-per-week treinos por semana com 4 a 8 exercícios.
+# Tudo é gravado com bulk_create em lotes de --batch-users usuários (uma transação por lote). Como bulk_create
+# não dispara signals, os totais das refeições e dos dias são recalculados ao final com rollups.rebuild().
+# Ex.: python manage.py generate_data --users 1000 --months 12 (cerca de 7 milhões de itens de refeição).
@@ -0,0 +1,58 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import imports
+
+
+class Command(BaseCommand):
+    help = 'Importa um CSV de alimentos (formato da API ou tabela no estilo TACO), atualizando pela descrição.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Arquivo CSV ("-" lê da entrada padrão).')
+        parser.add_argument('--encoding', default='utf-8-sig', help='Codificação do arquivo (ex.: latin-1).')
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Alimentos gravados por lote.')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Mostra o que seria criado ou alterado, sem gravar.')
+        parser.add_argument('--atomic', action='store_true',
+                            help='Grava o arquivo inteiro numa única transação (tudo ou nada).')
+
+    def handle(self, *args, **options):
+        self.show_changes = options['dry_run'] or options['verbosity'] > 1
+        try:
+            file = sys.stdin if options['path'] == '-' else open(options['path'], encoding=options['encoding'],
+                                                                 newline='')
+        except OSError as error:
+            raise CommandError(error)
+        with file:
+            try:
+                summary = imports.import_foods(imports.read_foods(file), options['chunk_size'],
+                                               options['dry_run'], self.report, options['atomic'])
+            except ValueError as error:
+                raise CommandError(error)
+
+        prefix = 'simulação: ' if options['dry_run'] else ''
+        self.stdout.write(f'{prefix}{summary["created"]} criados, {summary["updated"]} alterados, '
+                          f'{summary["unchanged"]} sem alteração, {summary["invalid"]} linhas inválidas.')
+
+    def report(self, change):
+        if change['action'] == 'invalid':
+            self.stderr.write(f'linha {change["line"]} ignorada: {change["invalid"]}')
+            return
+        if not self.show_changes:
+            return
+        if change['action'] == 'created':
+            self.stdout.write(f'+ {change["description"]}: {change["after"]}')
+            return
+        diff = {
+            field: f'{change["before"][field]} -> {value}'
+            for field, value in change['after'].items()
+            if change['before'][field] != value
+        }
+        self.stdout.write(f'~ {change["description"]}: {diff}')
+
+# Lê o arquivo linha a linha e grava em lotes, uma transação por lote (core/imports.py), com memória constante
+# para tabelas grandes. Com --atomic, um erro desfaz o arquivo todo.
+# Linhas inválidas são ignoradas e listadas na saída de erro. Com --dry-run (ou -v 2), lista cada alimento novo (+)
+# e cada campo alterado (~) em relação ao banco.
+# Ex.: python manage.py import_foods taco.csv --encoding latin-1 --dry-run
@@ -0,0 +1,230 @@
+import datetime
+import random
+import time
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from core import cache, models, rollups
+from core.management.commands.generate_data import DAILY_MEALS, EXTRA_MEALS, PREFIX, TRAINING_NAMES
+
+TABLES = [models.Food, models.Meal, models.MealFood, models.Training, models.TrainingExercise]
+
+# TABLES: tabelas carregadas, na ordem das chaves estrangeiras.
+
+SECONDARY_INDEXES_SQL = """
+    SELECT i.relname, pg_get_indexdef(ix.indexrelid)
+    FROM pg_index ix
+    INNER JOIN pg_class i ON i.oid = ix.indexrelid
+    INNER JOIN pg_class t ON t.oid = ix.indrelid
+    WHERE t.relname = ANY(%s)
+      AND NOT ix.indisprimary
+      AND NOT ix.indisunique
+      AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = ix.indexrelid)
+"""
+
+# SECONDARY_INDEXES_SQL: índices secundários (não primários, não únicos e que não sustentam constraints),
+# que podem ser removidos durante a carga e recriados depois com a mesma definição.
+
+
+def copy_rows(cursor, model, fields, rows):
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(model._meta.get_field(field).column) for field in fields)
+    with cursor.copy(f'COPY {quote(model._meta.db_table)} ({columns}) FROM STDIN') as copy:
+        for row in rows:
+            copy.write_row(row)
+    return cursor.rowcount
+
+
+def copy_csv(cursor, model, path, block_size=1 << 20):
+    quote = connection.ops.quote_name
+    with open(path, 'rb') as file:
+        header = file.readline().decode().strip()
+        columns = ', '.join(quote(column.strip()) for column in header.split(','))
+        with cursor.copy(f'COPY {quote(model._meta.db_table)} ({columns}) FROM STDIN WITH (FORMAT csv)') as copy:
+            while block := file.read(block_size):
+                copy.write(block)
+    return cursor.rowcount
+
+
+def reserve_ids(cursor, model, count):
+    cursor.execute('SELECT pg_get_serial_sequence(%s, %s)', [model._meta.db_table, model._meta.pk.column])
+    sequence = cursor.fetchone()[0]
+    cursor.execute('SELECT setval(%s, nextval(%s) + %s - 1)', [sequence, sequence, count])
+    last = cursor.fetchone()[0]
+    return range(last - count + 1, last + 1)
+
+# copy_rows: envia as linhas (tuplas na ordem de fields) com COPY ... FROM STDIN, sem montar INSERTs.
+# copy_csv: envia um CSV (primeira linha = colunas do banco) em blocos de 1 MB, sem interpretar as linhas.
+# reserve_ids: reserva um intervalo de ids na sequence da tabela, para que as linhas filhas (itens de refeição,
+# exercícios do treino) já saibam o id do pai sem consultar o banco. A carga não deve rodar junto com outras escritas.
+
+
+class Command(BaseCommand):
+    help = 'Carga rápida com COPY FROM STDIN em food, meal, meal_food, training e training_exercise.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--import-dir',
+                            help='Importa <tabela>.csv desse diretório (cabeçalho com as colunas do banco).')
+        parser.add_argument('--users', type=int, default=1000, help='Usuários sintéticos gerados.')
+        parser.add_argument('--days', type=int, default=365, help='Dias de histórico por usuário.')
+        parser.add_argument('--items-per-meal', type=int, default=5)
+        parser.add_argument('--trainings-per-week', type=int, default=4)
+        parser.add_argument('--batch-users', type=int, default=200, help='Usuários por bloco (um COPY por tabela).')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--drop-indexes', action='store_true',
+                            help='Remove os índices secundários durante a carga e os recria no final.')
+        parser.add_argument('--skip-rollups', action='store_true',
+                            help='Não recalcula os totais de calorias (refeições e dias) ao final.')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('O carregamento por COPY precisa do PostgreSQL.')
+
+        self.totals = {model._meta.db_table: [0, 0.0] for model in TABLES}
+        indexes = self.drop_indexes() if options['drop_indexes'] else []
+        try:
+            if options['import_dir']:
+                self.import_dir(Path(options['import_dir']))
+            else:
+                self.generate(options)
+        finally:
+            if indexes:
+                self.create_indexes(indexes)
+
+        if not options['skip_rollups']:
+            self.timed('rollups', rollups.rebuild)
+        if self.totals['food'][0]:
+            cache.bump_version(models.Food)
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {", ".join(model._meta.db_table for model in TABLES)}')
+
+        self.stdout.write(f'{"tabela":<20}{"linhas":>12}{"segundos":>10}{"linhas/s":>12}')
+        for table, (rows, elapsed) in self.totals.items():
+            if rows:
+                self.stdout.write(f'{table:<20}{rows:>12}{elapsed:>10.1f}{rows / elapsed:>12.0f}')
+
+    def timed(self, label, function, *args):
+        started = time.perf_counter()
+        result = function(*args)
+        self.stdout.write(f'{label}: {time.perf_counter() - started:.1f} s')
+        return result
+
+    def copy(self, model, fields, rows):
+        started = time.perf_counter()
+        with connection.cursor() as cursor:
+            count = copy_rows(cursor, model, fields, rows)
+        total = self.totals[model._meta.db_table]
+        total[0] += count
+        total[1] += time.perf_counter() - started
+
+    def drop_indexes(self):
+        with connection.cursor() as cursor:
+            cursor.execute(SECONDARY_INDEXES_SQL, [[model._meta.db_table for model in TABLES]])
+            indexes = cursor.fetchall()
+            for name, _ in indexes:
+                cursor.execute(f'DROP INDEX {connection.ops.quote_name(name)}')
+        self.stdout.write(f'{len(indexes)} índices secundários removidos.')
+        return indexes
+
+    def create_indexes(self, indexes):
+        with connection.cursor() as cursor:
+            cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+            for name, definition in indexes:
+                self.timed(f'índice {name}', cursor.execute, definition)
+
+    def import_dir(self, directory):
+        for model in TABLES:
+            path = directory / f'{model._meta.db_table}.csv'
+            if not path.exists():
+                continue
+            started = time.perf_counter()
+            with transaction.atomic(), connection.cursor() as cursor:
+                count = copy_csv(cursor, model, path)
+                for sql in connection.ops.sequence_reset_sql(no_style(), [model]):
+                    cursor.execute(sql)
+            self.totals[model._meta.db_table] = [count, time.perf_counter() - started]
+
+    def generate(self, options):
+        foods = list(models.Food.active_objects.values_list('id', flat=True))
+        exercises = list(models.Exercise.active_objects.values_list('id', flat=True))
+        if not foods or not exercises:
+            raise CommandError('Catálogos vazios: aplique as migrações (0014_dados_banco) antes de gerar dados.')
+
+        rng = random.Random(options['seed'])
+        now = timezone.now()
+        end = datetime.date.today()
+        days = [end - datetime.timedelta(days=day) for day in range(options['days'])]
+        first = User.objects.filter(username__startswith=PREFIX).count()
+
+        for offset in range(0, options['users'], options['batch_users']):
+            batch = range(first + offset, first + min(offset + options['batch_users'], options['users']))
+            with transaction.atomic():
+                users = User.objects.bulk_create(
+                    User(username=f'{PREFIX}{index}@dailyfit.com', email=f'{PREFIX}{index}@dailyfit.com',
+                         password='!')
+                    for index in batch
+                )
+                Token.objects.bulk_create(Token(user=user, key=Token.generate_key()) for user in users)
+                models.UserProfile.objects.bulk_create(
+                    models.UserProfile(login=user, age=rng.randint(18, 65), weight=round(rng.uniform(50, 110), 1),
+                                       height=round(rng.uniform(1.5, 1.95), 2))
+                    for user in users
+                )
+                self.generate_batch([user.pk for user in users], days, now, rng, foods, exercises, options)
+            self.stdout.write(f'{offset + len(batch)}/{options["users"]} usuários, '
+                              f'{self.totals["meal_food"][0]} itens de refeição...')
+
+    def generate_batch(self, user_ids, days, now, rng, foods, exercises, options):
+        meals = [
+            (user_id, day, meal_type)
+            for user_id in user_ids
+            for day in days
+            for meal_type in DAILY_MEALS + rng.sample(EXTRA_MEALS, rng.randint(0, 2))
+        ]
+        trainings = [
+            (user_id, day)
+            for user_id in user_ids
+            for day in days
+            if rng.random() < options['trainings_per_week'] / 7
+        ]
+        with connection.cursor() as cursor:
+            meal_ids = reserve_ids(cursor, models.Meal, len(meals))
+            training_ids = reserve_ids(cursor, models.Training, len(trainings)) if trainings else []
+
+        base = ['created_at', 'modified_at', 'active']
+        self.copy(models.Meal, ['id', *base, 'user', 'date', 'meal_type', 'total_kcal'], (
+            (meal_id, now, now, True, user_id, day, meal_type, 0)
+            for meal_id, (user_id, day, meal_type) in zip(meal_ids, meals)
+        ))
+        self.copy(models.MealFood, [*base, 'meal', 'food', 'value'], (
+            (now, now, True, meal_id, rng.choice(foods), round(rng.uniform(30, 300)))
+            for meal_id in meal_ids
+            for _ in range(max(1, round(rng.gauss(options['items_per_meal'], 1))))
+        ))
+        self.copy(models.Training, ['id', *base, 'user', 'name', 'date'], (
+            (training_id, now, now, True, user_id, rng.choice(TRAINING_NAMES), day)
+            for training_id, (user_id, day) in zip(training_ids, trainings)
+        ))
+        self.copy(models.TrainingExercise, [*base, 'training', 'exercise', 'repetitions', 'series', 'rest_time'], (
+            (now, now, True, training_id, exercise, rng.choice([8, 10, 12, 15]), rng.choice([3, 4]),
+             datetime.timedelta(seconds=rng.choice([45, 60, 90])))
+            for training_id in training_ids
+            for exercise in rng.sample(exercises, min(len(exercises), rng.randint(4, 8)))
+        ))
+
+# Sem --import-dir, gera o mesmo tipo de histórico do generate_data, mas envia as linhas com COPY em blocos de
+# --batch-users usuários (uma transação por bloco), sem criar objetos do ORM por linha.
+# Com --import-dir, carrega <tabela>.csv (food, meal, meal_food, training, training_exercise, nessa ordem) e ajusta
+# as sequences de id. As colunas obrigatórias (ex.: cs_active, dt_created_at) precisam estar no CSV.
+# --drop-indexes remove os índices secundários antes da carga e os recria ao final (mesmo em caso de erro). As chaves
+# estrangeiras são deferidas; SET CONSTRAINTS ALL IMMEDIATE as verifica antes do CREATE INDEX, que não roda com
+# verificações pendentes quando a carga está dentro de uma transação externa.
+# COPY não dispara signals: ao final os totais de calorias são recalculados (rollups.rebuild) e, se houve carga
+# em food, o cache do catálogo é invalidado.
+# Ex.: python manage.py load_copy --users 10000 --days 365 --drop-indexes (cerca de 50 milhões de itens de refeição).
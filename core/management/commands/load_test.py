@@ -0,0 +1,196 @@
+import asyncio
+import datetime
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from wsgiref.util import setup_testing_defaults
+
+from django.contrib.auth.models import User
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.authtoken.models import Token
+
+from core import models
+
+ENDPOINTS = [
+    ('meal.list', '/api/meal/', '/api/async/meal/', ''),
+    ('training.list', '/api/training/', '/api/async/training/', ''),
+    ('meal.daily_summary', '/api/meal/daily-summary/', '/api/async/meal/daily-summary/', 'from={start}&to={end}'),
+    ('userprofile.me', '/api/userprofile/me/', '/api/async/userprofile/me/', ''),
+]
+
+# ENDPOINTS: (nome, rota síncrona, rota assíncrona, query string) de cada leitura medida.
+
+
+def percentile(values, fraction):
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def run_wsgi(handler, path, query, token, concurrency, requests):
+    def call(_):
+        environ = {'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': query,
+                   'HTTP_HOST': 'localhost', 'HTTP_AUTHORIZATION': f'Token {token}'}
+        setup_testing_defaults(environ)
+        statuses = []
+        started = time.perf_counter()
+        response = handler(environ, lambda status, headers, exc_info=None: statuses.append(int(status[:3])))
+        b''.join(response)
+        response.close()
+        return statuses[0], time.perf_counter() - started
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(call, range(requests)))
+
+
+async def run_asgi(application, path, query, token, concurrency, requests):
+    headers = [(b'host', b'localhost'), (b'authorization', f'Token {token}'.encode())]
+    pending = iter(range(requests))
+    results = []
+
+    async def call():
+        scope = {'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+                 'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'query_string': query.encode(),
+                 'root_path': '', 'headers': headers, 'client': ('127.0.0.1', 0), 'server': ('localhost', 80)}
+        body_sent = asyncio.Event()
+        statuses = []
+
+        async def receive():
+            if not body_sent.is_set():
+                body_sent.set()
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+            await asyncio.Future()
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                statuses.append(message['status'])
+
+        started = time.perf_counter()
+        await application(scope, receive, send)
+        return statuses[0], time.perf_counter() - started
+
+    async def worker():
+        for _ in pending:
+            results.append(await call())
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return results
+
+# run_wsgi / run_asgi: chamam o handler WSGI (um pool de threads, como um servidor WSGI com threads) e o
+# handler ASGI (tarefas no event loop) direto no processo, sem rede, com `concurrency` clientes simultâneos.
+
+
+def load_test_subprocess(env, concurrency, requests, endpoint, mode):
+    result = subprocess.run(
+        [sys.executable, sys.argv[0], 'load_test', '--json', '--concurrency', concurrency,
+         '--requests', str(requests), '--endpoint', endpoint, '--mode', mode],
+        env={**os.environ, **env}, capture_output=True, text=True,
+    )
+    if result.returncode:
+        raise CommandError(result.stderr.strip())
+    return json.loads(result.stdout)
+
+# load_test_subprocess: roda o load_test em outro processo com variáveis de ambiente alteradas, para comparar
+# opções lidas só na inicialização do Django (conexões, perfil de settings).
+
+
+class Command(BaseCommand):
+    help = 'Teste de carga das leituras principais: WSGI x ASGI (views síncronas) x ASGI (views assíncronas).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', default='1,8,32',
+                            help='Níveis de concorrência separados por vírgula.')
+        parser.add_argument('--requests', type=int, default=200, help='Requisições por medição.')
+        parser.add_argument('--username', help='Usuário existente usado nas requisições (padrão: usuário sintético).')
+        parser.add_argument('--endpoint', action='append', choices=[name for name, *_ in ENDPOINTS],
+                            help='Mede apenas esse endpoint (pode ser repetido).')
+        parser.add_argument('--mode', action='append', choices=['wsgi', 'asgi', 'asgi-async'],
+                            help='Mede apenas esse modo (pode ser repetido).')
+        parser.add_argument('--json', action='store_true', help='Imprime o resultado em JSON.')
+
+    def handle(self, *args, **options):
+        levels = [int(level) for level in options['concurrency'].split(',')]
+        user, created = self.get_user(options['username'])
+        try:
+            token = Token.objects.get_or_create(user=user)[0].key
+            dates = models.Meal.objects.filter(user=user).order_by('date').values_list('date', flat=True)
+            start, end = (dates.first() or datetime.date.today()), (dates.last() or datetime.date.today())
+            report = self.measure(token, levels, options['requests'], start, end, options['endpoint'], options['mode'])
+        finally:
+            if created:
+                user.delete()
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        self.stdout.write(f'{"endpoint":<20}{"modo":<12}{"conc.":>6}{"req/s":>9}{"p50 (ms)":>10}{"p99 (ms)":>10}')
+        for row in report:
+            self.stdout.write(f'{row["endpoint"]:<20}{row["mode"]:<12}{row["concurrency"]:>6}'
+                              f'{row["rps"]:>9.1f}{row["p50_ms"]:>10.1f}{row["p99_ms"]:>10.1f}')
+
+    def measure(self, token, levels, requests, start, end, endpoints=None, only_modes=None):
+        wsgi, application = WSGIHandler(), ASGIHandler()
+        report = []
+        for name, sync_path, async_path, query in ENDPOINTS:
+            if endpoints and name not in endpoints:
+                continue
+            query = query.format(start=start, end=min(end, start + datetime.timedelta(days=366)))
+            modes = [
+                ('wsgi', lambda c, n: run_wsgi(wsgi, sync_path, query, token, c, n)),
+                ('asgi', lambda c, n: asyncio.run(run_asgi(application, sync_path, query, token, c, n))),
+                ('asgi-async', lambda c, n: asyncio.run(run_asgi(application, async_path, query, token, c, n))),
+            ]
+            for mode, run in modes:
+                if only_modes and mode not in only_modes:
+                    continue
+                run(1, 3)
+                for concurrency in levels:
+                    started = time.perf_counter()
+                    results = run(concurrency, requests)
+                    elapsed = time.perf_counter() - started
+                    errors = [status for status, _ in results if status != 200]
+                    if errors:
+                        raise CommandError(f'{mode} {name}: respostas com erro {sorted(set(errors))}')
+                    latencies = sorted(latency for _, latency in results)
+                    report.append({
+                        'endpoint': name,
+                        'mode': mode,
+                        'concurrency': concurrency,
+                        'rps': round(len(results) / elapsed, 1),
+                        'p50_ms': round(statistics.median(latencies) * 1000, 2),
+                        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+                    })
+        return report
+
+    def get_user(self, username):
+        if username:
+            try:
+                return User.objects.get(username=username), False
+            except User.DoesNotExist:
+                raise CommandError(f'Usuário {username} não encontrado.')
+
+        user = User.objects.create(username=f'load_test_{time.time_ns()}')
+        food = models.Food.objects.order_by('id').first() or models.Food.objects.create(
+            description='Alimento do teste de carga', total_kcal=100, value=100,
+        )
+        today = datetime.date.today()
+        meals = models.Meal.objects.bulk_create(
+            models.Meal(user=user, date=today - datetime.timedelta(days=day // 4), meal_type=day % 4 + 1)
+            for day in range(120)
+        )
+        models.MealFood.objects.bulk_create(
+            models.MealFood(meal=meal, food=food, value=100) for meal in meals for _ in range(3)
+        )
+        models.Training.objects.bulk_create(
+            models.Training(user=user, name=f'Treino {day}', date=today - datetime.timedelta(days=day))
+            for day in range(30)
+        )
+        models.UserProfile.objects.create(login=user, age=30, weight=70, height=1.75)
+        return user, True
+
+# get_user: sem --username, cria um usuário com 120 refeições (3 itens cada), 30 treinos e perfil,
+# removido ao final. O teste usa o token do usuário, passando pela mesma autenticação das requisições reais.
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core import models, rollups
+
+
+class Command(BaseCommand):
+    help = 'Reconstrói os totais de calorias por refeição e por dia a partir de MealFood e Food.'
+
+    def handle(self, *args, **options):
+        rollups.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'{models.Meal.objects.count()} refeições e '
+            f'{models.DailyNutrition.objects.count()} dias recalculados.'
+        ))
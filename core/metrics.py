@@ -0,0 +1,242 @@
+import contextvars
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import HttpResponse
+from rest_framework.renderers import JSONRenderer
+
+logger = logging.getLogger('core.metrics')
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+_lock = threading.Lock()
+_histograms = {}
+_counters = {}
+
+
+def observe(name, value, labels=None, buckets=SECONDS_BUCKETS):
+    key = (name, tuple(sorted((labels or {}).items())))
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = {
+                'buckets': buckets, 'counts': [0] * len(buckets), 'count': 0, 'sum': 0.0, 'max': 0.0,
+            }
+        for index, bound in enumerate(histogram['buckets']):
+            if value <= bound:
+                histogram['counts'][index] += 1
+        histogram['count'] += 1
+        histogram['sum'] += value
+        histogram['max'] = max(histogram['max'], value)
+
+
+def increment(name, labels=None):
+    key = (name, tuple(sorted((labels or {}).items())))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + 1
+
+
+@contextmanager
+def timer(name, labels=None):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - started, labels)
+
+
+def snapshot():
+    with _lock:
+        totals = {}
+        for (name, _), histogram in _histograms.items():
+            total = totals.setdefault(name, {'count': 0, 'sum': 0.0, 'max': 0.0})
+            total['count'] += histogram['count']
+            total['sum'] += histogram['sum']
+            total['max'] = max(total['max'], histogram['max'])
+        return totals
+
+# Métricas em memória, por processo: histogramas (quantidade, soma, máximo e faixas) e contadores,
+# separados por nome e labels. Ex.: with metrics.timer('login.authenticate_seconds'): ...
+# snapshot: totais por nome, somando todos os labels.
+
+
+def prometheus_name(name):
+    return 'dailyfit_' + name.replace('.', '_')
+
+
+def prometheus_labels(labels, **extra):
+    pairs = [*labels, *extra.items()]
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+def render_prometheus():
+    lines = []
+    with _lock:
+        for name in sorted({name for name, _ in _histograms}):
+            metric = prometheus_name(name)
+            lines.append(f'# TYPE {metric} histogram')
+            for (other, labels), histogram in sorted(_histograms.items()):
+                if other != name:
+                    continue
+                for bound, count in zip(histogram['buckets'], histogram['counts']):
+                    lines.append(f'{metric}_bucket{prometheus_labels(labels, le=bound)} {count}')
+                lines.append(f'{metric}_bucket{prometheus_labels(labels, le="+Inf")} {histogram["count"]}')
+                lines.append(f'{metric}_sum{prometheus_labels(labels)} {histogram["sum"]}')
+                lines.append(f'{metric}_count{prometheus_labels(labels)} {histogram["count"]}')
+        for name in sorted({name for name, _ in _counters}):
+            metric = prometheus_name(name)
+            lines.append(f'# TYPE {metric}_total counter')
+            for (other, labels), value in sorted(_counters.items()):
+                if other == name:
+                    lines.append(f'{metric}_total{prometheus_labels(labels)} {value}')
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_view(request):
+    if not settings.METRICS_TOKEN and settings.METRICS_REQUIRE_TOKEN:
+        return HttpResponse(status=404)
+    if settings.METRICS_TOKEN and request.headers.get('Authorization') != f'Bearer {settings.METRICS_TOKEN}':
+        return HttpResponse(status=401)
+    return HttpResponse(render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+# metrics_view: GET /metrics/ no formato texto do Prometheus. Se METRICS_TOKEN estiver definido,
+# exige o cabeçalho Authorization: Bearer <METRICS_TOKEN>. Com METRICS_REQUIRE_TOKEN (perfil prod) e sem token
+# configurado, a rota fica desligada (404) em vez de pública.
+
+
+class RequestStats:
+    def __init__(self):
+        self.view = None
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.serialize_seconds = 0.0
+
+
+_request_stats = contextvars.ContextVar('request_stats', default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    stats = _request_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.sql_seconds += time.perf_counter() - started
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+# record_query: execute_wrapper instalado em toda conexão nova (signal connection_created, em core/signals.py).
+# Conta as consultas e o tempo de SQL da requisição atual. Como a requisição fica num ContextVar, consultas feitas
+# em outras threads pelo ORM assíncrono (sync_to_async copia o contexto) também entram na conta.
+
+
+@contextmanager
+def serialization():
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.serialize_seconds += time.perf_counter() - started
+
+
+class TimedJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with serialization():
+            return super().render(data, accepted_media_type, renderer_context)
+
+# serialization: soma à requisição atual o tempo gasto gerando o JSON da resposta.
+# TimedJSONRenderer: JSONRenderer do DRF medido dessa forma (as views assíncronas usam serialization direto).
+
+
+def view_name(view_func):
+    cls = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+    if cls is None:
+        return getattr(view_func, '__name__', 'unknown')
+    return cls.__name__
+
+
+class InstrumentationMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats, token, started = self.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_stats.reset(token)
+        return self.finish(request, response, stats, started)
+
+    async def __acall__(self, request):
+        stats, token, started = self.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_stats.reset(token)
+        return self.finish(request, response, stats, started)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        stats = _request_stats.get()
+        if stats is not None:
+            actions = getattr(view_func, 'actions', None) or {}
+            method = request.method.lower()
+            stats.view = f'{view_name(view_func)}.{actions.get(method, method)}'
+
+    def start(self):
+        stats = RequestStats()
+        return stats, _request_stats.set(stats), time.perf_counter()
+
+    def finish(self, request, response, stats, started):
+        total = time.perf_counter() - started
+        view = stats.view or 'unresolved'
+        labels = {'view': view}
+        observe('http.request_seconds', total, labels)
+        observe('http.sql_seconds', stats.sql_seconds, labels)
+        observe('http.serialize_seconds', stats.serialize_seconds, labels)
+        observe('http.queries', stats.queries, labels, buckets=QUERY_BUCKETS)
+        if not response.streaming:
+            observe('http.response_bytes', len(response.content), labels, buckets=BYTES_BUCKETS)
+
+        threshold = settings.METRICS_QUERY_ALERT_THRESHOLDS.get(view, settings.METRICS_QUERY_ALERT_THRESHOLD)
+        if threshold and stats.queries > threshold:
+            increment('http.query_alerts', labels)
+            logger.warning('%s %s executou %d consultas (limite %d).', request.method, request.path, stats.queries,
+                           threshold, extra={'view': view, 'queries': stats.queries})
+
+        response['Server-Timing'] = ', '.join([
+            f'db;desc="{stats.queries} queries";dur={stats.sql_seconds * 1000:.2f}',
+            f'serialize;dur={stats.serialize_seconds * 1000:.2f}',
+            f'app;dur={max(total - stats.sql_seconds - stats.serialize_seconds, 0) * 1000:.2f}',
+            f'total;dur={total * 1000:.2f}',
+        ])
+        return response
+
+# InstrumentationMiddleware: mede cada requisição e registra, por view (ex.: MealViewSet.list), a duração total,
+# a quantidade de consultas, o tempo de SQL, o tempo de serialização (TimedJSONRenderer) e o tamanho da resposta.
+# Os valores saem no cabeçalho Server-Timing (visível nas ferramentas do navegador) e nos histogramas de /metrics/.
+# Requisições com mais consultas que METRICS_QUERY_ALERT_THRESHOLD (ou o limite da view em
+# METRICS_QUERY_ALERT_THRESHOLDS) geram um aviso no logger core.metrics e somam em dailyfit_http_query_alerts_total.
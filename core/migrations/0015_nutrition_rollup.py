@@ -0,0 +1,56 @@
+# Generated by Django 5.1.3 on 2026-10-18 12:19
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_dados_banco'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='meal',
+            name='total_kcal',
+            field=models.FloatField(db_column='nb_total_kcal', default=0),
+        ),
+        migrations.CreateModel(
+            name='DailyNutrition',
+            fields=[
+                ('id', models.BigAutoField(db_column='id', primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_column='dt_created_at', null=True)),
+                ('modified_at', models.DateTimeField(auto_now=True, db_column='dt_modified_at', null=True)),
+                ('active', models.BooleanField(db_column='cs_active', default=True, null=True)),
+                ('date', models.DateField(db_column='tx_date')),
+                ('total_kcal', models.FloatField(db_column='nb_total_kcal', default=0)),
+                ('user', models.ForeignKey(db_column='nb_user', on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Resumo nutricional diário',
+                'verbose_name_plural': 'Resumos nutricionais diários',
+                'db_table': 'daily_nutrition',
+                'managed': True,
+                'constraints': [models.UniqueConstraint(fields=('user', 'date'), name='daily_nutrition_user_date_uniq')],
+            },
+        ),
+        migrations.RunSQL(
+            """
+            UPDATE meal SET nb_total_kcal = COALESCE((
+                SELECT SUM(mf.nb_value / f.nb_value * f.nb_total_kcal)
+                FROM meal_food mf
+                INNER JOIN food f ON f.id = mf.nb_food
+                WHERE mf.nb_meal = meal.id AND mf.nb_value > 0 AND f.nb_value > 0
+            ), 0);
+
+            INSERT INTO daily_nutrition (dt_created_at, dt_modified_at, cs_active, nb_user, tx_date, nb_total_kcal)
+            SELECT NOW(), NOW(), TRUE, nb_user, tx_date, SUM(nb_total_kcal)
+            FROM meal
+            GROUP BY nb_user, tx_date;
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.1.3 on 2026-10-18 12:21
+
+import core.functions
+import django.contrib.postgres.indexes
+import django.contrib.postgres.operations
+import django.db.models.functions.text
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_nutrition_rollup'),
+    ]
+
+    operations = [
+        django.contrib.postgres.operations.TrigramExtension(),
+        migrations.RunSQL(
+            """
+            CREATE OR REPLACE FUNCTION immutable_unaccent(text) RETURNS text AS
+            $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$
+            LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT;
+            """,
+            reverse_sql="DROP FUNCTION IF EXISTS immutable_unaccent(text);",
+        ),
+        migrations.AddIndex(
+            model_name='food',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(core.functions.ImmutableUnaccent(django.db.models.functions.text.Lower('description')), name='gin_trgm_ops'), name='food_description_trgm_idx'),
+        ),
+    ]
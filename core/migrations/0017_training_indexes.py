@@ -0,0 +1,26 @@
+# Generated by Django 5.1.3 on 2026-10-18 12:22
+
+import core.functions
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_food_search'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='training',
+            index=models.Index(fields=['user', 'date'], name='training_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='training',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(core.functions.ImmutableUnaccent(django.db.models.functions.text.Lower('name')), name='gin_trgm_ops'), name='training_name_trgm_idx'),
+        ),
+    ]
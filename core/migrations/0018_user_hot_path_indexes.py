@@ -0,0 +1,53 @@
+# Generated by Django 5.1.3 on 2026-10-18 12:23
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_training_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='dailynutrition',
+            name='user',
+            field=models.ForeignKey(db_column='nb_user', db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='meal',
+            name='user',
+            field=models.ForeignKey(db_column='nb_user', db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='mealfood',
+            name='meal',
+            field=models.ForeignKey(db_column='nb_meal', db_index=False, on_delete=django.db.models.deletion.CASCADE, to='core.meal'),
+        ),
+        migrations.AlterField(
+            model_name='training',
+            name='user',
+            field=models.ForeignKey(db_column='nb_user', db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='trainingexercise',
+            name='training',
+            field=models.ForeignKey(db_column='tx_training', db_index=False, on_delete=django.db.models.deletion.CASCADE, to='core.training'),
+        ),
+        migrations.AddIndex(
+            model_name='meal',
+            index=models.Index(fields=['user', 'date'], name='meal_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mealfood',
+            index=models.Index(fields=['meal'], include=('food', 'value'), name='meal_food_meal_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trainingexercise',
+            index=models.Index(fields=['training'], include=('exercise', 'repetitions', 'series'), name='training_exercise_training_idx'),
+        ),
+    ]
@@ -0,0 +1,98 @@
+# Generated by Django 5.1.3 on 2026-10-18 12:36
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_user_hot_path_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            """
+            UPDATE user_profile SET cs_active = TRUE WHERE cs_active IS NULL;
+            UPDATE muscle_group SET cs_active = TRUE WHERE cs_active IS NULL;
+            UPDATE exercise SET cs_active = TRUE WHERE cs_active IS NULL;
+            UPDATE training SET cs_active = TRUE WHERE cs_active IS NULL;
+            UPDATE training_exercise SET cs_active = TRUE WHERE cs_active IS NULL;
+            UPDATE food SET cs_active = TRUE WHERE cs_active IS NULL;
+            UPDATE meal SET cs_active = TRUE WHERE cs_active IS NULL;
+            UPDATE meal_food SET cs_active = TRUE WHERE cs_active IS NULL;
+            UPDATE daily_nutrition SET cs_active = TRUE WHERE cs_active IS NULL;
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.RemoveIndex(
+            model_name='meal',
+            name='meal_user_date_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='training',
+            name='training_user_date_idx',
+        ),
+        migrations.AlterField(
+            model_name='dailynutrition',
+            name='active',
+            field=models.BooleanField(db_column='cs_active', default=True),
+        ),
+        migrations.AlterField(
+            model_name='exercise',
+            name='active',
+            field=models.BooleanField(db_column='cs_active', default=True),
+        ),
+        migrations.AlterField(
+            model_name='food',
+            name='active',
+            field=models.BooleanField(db_column='cs_active', default=True),
+        ),
+        migrations.AlterField(
+            model_name='meal',
+            name='active',
+            field=models.BooleanField(db_column='cs_active', default=True),
+        ),
+        migrations.AlterField(
+            model_name='mealfood',
+            name='active',
+            field=models.BooleanField(db_column='cs_active', default=True),
+        ),
+        migrations.AlterField(
+            model_name='musclegroup',
+            name='active',
+            field=models.BooleanField(db_column='cs_active', default=True),
+        ),
+        migrations.AlterField(
+            model_name='training',
+            name='active',
+            field=models.BooleanField(db_column='cs_active', default=True),
+        ),
+        migrations.AlterField(
+            model_name='trainingexercise',
+            name='active',
+            field=models.BooleanField(db_column='cs_active', default=True),
+        ),
+        migrations.AlterField(
+            model_name='userprofile',
+            name='active',
+            field=models.BooleanField(db_column='cs_active', default=True),
+        ),
+        migrations.AddIndex(
+            model_name='meal',
+            index=models.Index(condition=models.Q(('active', True)), fields=['user', 'date'], name='meal_active_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='meal',
+            index=models.Index(fields=['user', 'modified_at'], name='meal_user_modified_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='training',
+            index=models.Index(condition=models.Q(('active', True)), fields=['user', 'date'], name='training_active_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='training',
+            index=models.Index(fields=['user', 'modified_at'], name='training_user_modified_idx'),
+        ),
+    ]
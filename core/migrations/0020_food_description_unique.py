@@ -0,0 +1,56 @@
+# Generated by Django 5.1.3 on 2026-10-18 12:55
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def merge_duplicate_foods(apps, schema_editor):
+    Food = apps.get_model('core', 'Food')
+    MealFood = apps.get_model('core', 'MealFood')
+    descriptions = (
+        Food.objects.order_by().values('description').annotate(count=Count('id')).filter(count__gt=1)
+        .values_list('description', flat=True)
+    )
+    merges, conflicts = [], []
+    for description in descriptions:
+        foods = list(Food.objects.filter(description=description).order_by('id'))
+        if len({(food.total_kcal, food.unit, food.value) for food in foods}) > 1:
+            conflicts.append(f'{description!r}: ' + ', '.join(
+                f'id {food.pk} ({food.total_kcal} kcal / {food.value} unidade {food.unit})' for food in foods
+            ))
+        else:
+            merges.append(foods)
+    if conflicts:
+        raise ValueError(
+            'Alimentos com a mesma descrição e valores nutricionais diferentes; renomeie ou remova os repetidos '
+            'antes de aplicar a migração:\n' + '\n'.join(conflicts)
+        )
+
+    for keep, *duplicates in merges:
+        ids = [food.pk for food in duplicates]
+        MealFood.objects.filter(food_id__in=ids).update(food=keep)
+        if not keep.active and any(food.active for food in duplicates):
+            Food.objects.filter(pk=keep.pk).update(active=True)
+        Food.objects.filter(pk__in=ids).delete()
+    schema_editor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+
+# merge_duplicate_foods: antes da constraint única, junta os alimentos repetidos (mesma descrição) no de menor id:
+# os itens de refeição passam a apontar para ele e os demais são apagados. Só junta repetidos com as mesmas
+# calorias, unidade e quantidade, para não alterar o total das refeições; se houver diferença, a migração falha
+# listando os ids de cada descrição. SET CONSTRAINTS ALL IMMEDIATE verifica as chaves estrangeiras alteradas antes
+# do ALTER TABLE da constraint, que não roda com verificações pendentes na mesma transação.
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_active_rows'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_foods, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='food',
+            constraint=models.UniqueConstraint(fields=('description',), name='food_description_uniq'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.1.3 on 2026-10-18 13:08
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_food_description_unique'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncTombstone',
+            fields=[
+                ('id', models.BigAutoField(db_column='id', primary_key=True, serialize=False)),
+                ('table', models.CharField(db_column='tx_table', max_length=50)),
+                ('object_id', models.BigIntegerField(db_column='nb_object')),
+                ('deleted_at', models.DateTimeField(auto_now_add=True, db_column='dt_deleted_at')),
+                ('user', models.ForeignKey(db_column='nb_user', db_constraint=False, db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'sync_tombstone',
+                'managed': True,
+                'indexes': [models.Index(fields=['user', 'deleted_at'], name='tombstone_user_deleted_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.3 on 2026-10-18 13:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0021_sync_tombstone'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='mealfood',
+            index=models.Index(fields=['meal', 'modified_at'], name='meal_food_sync_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trainingexercise',
+            index=models.Index(fields=['training', 'modified_at'], name='training_exercise_sync_idx'),
+        ),
+    ]
@@ -1,9 +1,22 @@
 from datetime import datetime
 
 from django.contrib.auth.models import User
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import TrigramWordSimilarity
 from django.db import models
+from django.db.models import F, FloatField, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce, Lower
 
 from core import choices
+from core.functions import ImmutableUnaccent
+
+
+class ActiveManager(models.Manager):
+    def get_queryset(self):
+        return super().get_queryset().filter(active=True)
+
+# ActiveManager: devolve apenas os registros ativos (cs_active). Registros removidos pela API
+# continuam no banco como inativos, para o /api/sync/ informar a remoção aos clientes.
 
 
 class ModelBase(models.Model):
@@ -24,14 +37,20 @@ class ModelBase(models.Model):
     )
     active = models.BooleanField(
         db_column='cs_active',
-        null=True,
+        null=False,
         default=True
     )
 
+    objects = models.Manager()
+    active_objects = ActiveManager()
+
     class Meta:
         abstract = True
         managed = True
 
+# objects: todos os registros (admin, rollups e sincronização).
+# active_objects: apenas os ativos, usado pelos viewsets.
+
 
 class UserProfile(ModelBase):
     login = models.ForeignKey(
@@ -102,12 +121,35 @@ class Exercise(ModelBase):
         return self.name
 
 
+class UnaccentSearchQuerySet(models.QuerySet):
+    search_field = None
+
+    def search(self, term):
+        term = ImmutableUnaccent(Lower(models.Value(term)))
+        return self.alias(
+            search=ImmutableUnaccent(Lower(self.search_field)),
+        ).filter(
+            search__contains=term,
+        ).annotate(
+            rank=TrigramWordSimilarity(term, 'search'),
+        )
+
+# search: busca sem diferenciar acentos e maiúsculas em search_field.
+# O filtro LIKE é feito sobre a mesma expressão dos índices GIN/trigram (immutable_unaccent(lower(...))),
+# e rank traz a similaridade entre o termo e o texto para ordenar os resultados.
+
+
+class TrainingQuerySet(UnaccentSearchQuerySet):
+    search_field = 'name'
+
+
 class Training(ModelBase):
     user = models.ForeignKey(
         User,
         db_column='nb_user',
         on_delete=models.CASCADE,
-        null=False
+        null=False,
+        db_index=False,
     )
     name = models.CharField(
         db_column='tx_name',
@@ -120,9 +162,20 @@ class Training(ModelBase):
         default=None
     )
 
+    objects = TrainingQuerySet.as_manager()
+    active_objects = ActiveManager.from_queryset(TrainingQuerySet)()
+
     class Meta:
         managed = True
         db_table = 'training'
+        indexes = [
+            models.Index(fields=['user', 'date'], condition=Q(active=True), name='training_active_user_date_idx'),
+            models.Index(fields=['user', 'modified_at'], name='training_user_modified_idx'),
+            GinIndex(
+                OpClass(ImmutableUnaccent(Lower('name')), name='gin_trgm_ops'),
+                name='training_name_trgm_idx',
+            ),
+        ]
 
 
 class TrainingExercise(ModelBase):
@@ -135,6 +188,7 @@ class TrainingExercise(ModelBase):
         Training,
         db_column='tx_training',
         on_delete=models.CASCADE,
+        db_index=False,
     )
     repetitions = models.IntegerField(
         db_column='nb_repetitions',
@@ -152,6 +206,18 @@ class TrainingExercise(ModelBase):
     class Meta:
         managed = True
         db_table = 'training_exercise'
+        indexes = [
+            models.Index(
+                fields=['training'],
+                include=['exercise', 'repetitions', 'series'],
+                name='training_exercise_training_idx',
+            ),
+            models.Index(fields=['training', 'modified_at'], name='training_exercise_sync_idx'),
+        ]
+
+
+class FoodQuerySet(UnaccentSearchQuerySet):
+    search_field = 'description'
 
 
 class Food(ModelBase):
@@ -171,20 +237,76 @@ class Food(ModelBase):
         db_column='nb_value',
         default=0
     )
+
+    objects = FoodQuerySet.as_manager()
+    active_objects = ActiveManager.from_queryset(FoodQuerySet)()
+
     class Meta:
         db_table = 'food'
         verbose_name = "Comida"
         verbose_name_plural = "Comidas"
+        indexes = [
+            GinIndex(
+                OpClass(ImmutableUnaccent(Lower('description')), name='gin_trgm_ops'),
+                name='food_description_trgm_idx',
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['description'], name='food_description_uniq'),
+        ]
 
     def __str__(self):
         return self.description
 
+# food_description_uniq: a descrição identifica o alimento na importação de tabelas nutricionais
+# (upsert por descrição em core/imports.py).
+
+
+def meal_total_calories():
+    meal_foods = MealFood.active_objects.filter(
+        meal=OuterRef('pk'),
+        value__gt=0,
+        food__value__gt=0,
+    ).order_by().values('meal').annotate(
+        total=Sum(F('value') / F('food__value') * F('food__total_kcal'))
+    ).values('total')
+    return Coalesce(Subquery(meal_foods), 0.0, output_field=FloatField())
+
+# meal_total_calories: total de calorias de uma refeição (soma de value / food.value * food.total_kcal),
+# ignorando itens inativos ou com valores não positivos. É uma subquery correlacionada (e não JOIN + GROUP BY)
+# para que, numa listagem paginada, o banco calcule o total só das refeições da página.
+
+
+class MealQuerySet(models.QuerySet):
+    def with_total_calories(self):
+        return self.annotate(total_calories=meal_total_calories())
+
+    def calories_by_day(self):
+        return self.order_by('date', 'meal_type').values('date', 'meal_type').annotate(
+            total_calories=Coalesce(
+                Sum(
+                    F('mealfood__value') / F('mealfood__food__value') * F('mealfood__food__total_kcal'),
+                    filter=Q(mealfood__active=True, mealfood__value__gt=0, mealfood__food__value__gt=0),
+                ),
+                0.0,
+                output_field=FloatField(),
+            )
+        )
+
+# with_total_calories: anota em cada refeição o total de calorias calculado direto no banco.
+# Evita uma consulta por refeição ao listar.
+
+# calories_by_day: total de calorias agrupado por dia e tipo de refeição, numa única consulta
+# (JOIN de meal, meal_food e food com GROUP BY). Usado pelo resumo diário.
+
+
 class Meal(ModelBase):
     user = models.ForeignKey(
         User,
         db_column='nb_user',
         on_delete=models.CASCADE,
-        null=False
+        null=False,
+        db_index=False,
     )
     date = models.DateField(
         db_column='tx_date',
@@ -193,11 +315,23 @@ class Meal(ModelBase):
     meal_type = models.IntegerField(
         choices=choices.MEALS,
     )
+    total_kcal = models.FloatField(
+        db_column='nb_total_kcal',
+        default=0,
+    )
+
+    objects = MealQuerySet.as_manager()
+    active_objects = ActiveManager.from_queryset(MealQuerySet)()
+
     class Meta:
         managed = True
         db_table = 'meal'
         verbose_name = "Refeição"
         verbose_name_plural = "Refeições"
+        indexes = [
+            models.Index(fields=['user', 'date'], condition=Q(active=True), name='meal_active_user_date_idx'),
+            models.Index(fields=['user', 'modified_at'], name='meal_user_modified_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} -  {self.date}"
@@ -208,6 +342,7 @@ class MealFood(ModelBase):
         Meal,
         db_column='nb_meal',
         on_delete=models.CASCADE,
+        db_index=False,
     )
     food = models.ForeignKey(
         Food,
@@ -219,3 +354,87 @@ class MealFood(ModelBase):
     )
     class Meta:
         db_table = 'meal_food'
+        indexes = [
+            models.Index(fields=['meal'], include=['food', 'value'], name='meal_food_meal_idx'),
+            models.Index(fields=['meal', 'modified_at'], name='meal_food_sync_idx'),
+        ]
+
+# Os índices compostos/cobertos (Meta.indexes) substituem os índices simples das FKs de usuário,
+# refeição e treino (db_index=False): atendem às mesmas buscas e evitam manter dois índices por escrita.
+# Em meal e training, o índice (usuário, data) é parcial (WHERE cs_active): as listagens não passam pelas
+# linhas removidas. O índice (usuário, modified_at) atende o /api/sync/, que também precisa das removidas,
+# e a exclusão em cascata a partir do usuário. Os índices de meal_food e training_exercise continuam
+# completos, pois a cascata e o sync buscam os itens inativos pela refeição/treino. Para o sync, meal_food e
+# training_exercise têm também (refeição/treino, modified_at): a partir das refeições/treinos do usuário, cada
+# busca lê só os itens alterados depois de since, em vez de todos os itens de cada refeição/treino.
+
+
+class DailyNutrition(ModelBase):
+    user = models.ForeignKey(
+        User,
+        db_column='nb_user',
+        on_delete=models.CASCADE,
+        null=False,
+        db_index=False,
+    )
+    date = models.DateField(
+        db_column='tx_date',
+        null=False,
+    )
+    total_kcal = models.FloatField(
+        db_column='nb_total_kcal',
+        default=0,
+    )
+
+    class Meta:
+        managed = True
+        db_table = 'daily_nutrition'
+        verbose_name = "Resumo nutricional diário"
+        verbose_name_plural = "Resumos nutricionais diários"
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'date'], name='daily_nutrition_user_date_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} -  {self.date}"
+
+# Tabela desnormalizada com o total de calorias por usuário/dia.
+# É mantida incrementalmente pelos signals (core/rollups.py) e pode ser reconstruída com
+# o comando rebuild_nutrition_rollup. A leitura do total diário vira a busca de uma única linha indexada.
+
+
+class SyncTombstone(models.Model):
+    id = models.BigAutoField(
+        db_column='id',
+        primary_key=True,
+    )
+    user = models.ForeignKey(
+        User,
+        db_column='nb_user',
+        on_delete=models.CASCADE,
+        db_constraint=False,
+        db_index=False,
+    )
+    table = models.CharField(
+        db_column='tx_table',
+        max_length=50,
+    )
+    object_id = models.BigIntegerField(
+        db_column='nb_object',
+    )
+    deleted_at = models.DateTimeField(
+        db_column='dt_deleted_at',
+        auto_now_add=True,
+    )
+
+    class Meta:
+        managed = True
+        db_table = 'sync_tombstone'
+        indexes = [
+            models.Index(fields=['user', 'deleted_at'], name='tombstone_user_deleted_idx'),
+        ]
+
+# Registro das remoções definitivas (DELETE no banco) de treinos, exercícios de treino, refeições e itens de
+# refeição, gravado pelo signal post_delete (core/signals.py): cascata ao apagar um alimento ou exercício do
+# catálogo, queryset.delete(), admin. O /api/sync/ junta esses ids aos registros inativos em deleted.
+# Sem constraint no banco: as remoções em cascata de um usuário apagado ainda geram registros durante a exclusão.
@@ -0,0 +1,18 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+
+class IdCursorPagination(CursorPagination):
+    ordering = '-id'
+    page_size = settings.API_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = settings.API_MAX_PAGE_SIZE
+
+
+class DateCursorPagination(IdCursorPagination):
+    ordering = ('-date', '-id')
+
+# Paginação por cursor (keyset): cada página é buscada com WHERE sobre a chave de ordenação
+# em vez de OFFSET, então o custo de uma página não cresce com o tamanho da tabela.
+# O tamanho padrão vem de API_PAGE_SIZE e o cliente pode pedir outro com ?page_size=,
+# limitado por API_MAX_PAGE_SIZE.
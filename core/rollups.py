@@ -0,0 +1,91 @@
+from django.db import connection, transaction
+from django.db.models import Q, QuerySet, Sum
+from django.db.models.functions import Now
+
+from core import models
+
+
+def lock_days(keys):
+    keys = sorted(keys)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT pg_advisory_xact_lock(day.user_id, day.ordinal) FROM unnest(%s::integer[], %s::integer[]) '
+            'WITH ORDINALITY AS day(user_id, ordinal, position) ORDER BY day.position',
+            [[user_id for user_id, _ in keys], [date.toordinal() for _, date in keys]],
+        )
+
+# lock_days: trava os pares (usuário, dia) com pg_advisory_xact_lock(usuário, dia em ordinal) até o fim da
+# transação, sempre na mesma ordem para que duas transações não se travem mutuamente.
+
+
+def refresh_days(keys):
+    to_date = models.Meal._meta.get_field('date').to_python
+    keys = {(user_id, to_date(date)) for user_id, date in keys if user_id is not None and date is not None}
+    if not keys:
+        return
+
+    with transaction.atomic(savepoint=False):
+        lock_days(keys)
+        user_ids = {user_id for user_id, _ in keys}
+        dates = {date for _, date in keys}
+        totals = {
+            (row['user_id'], row['date']): row['total']
+            for row in models.Meal.active_objects.filter(user_id__in=user_ids, date__in=dates)
+            .order_by().values('user_id', 'date').annotate(total=Sum('total_kcal'))
+            if (row['user_id'], row['date']) in keys
+        }
+
+        if totals:
+            models.DailyNutrition.objects.bulk_create(
+                [
+                    models.DailyNutrition(user_id=user_id, date=date, total_kcal=total or 0)
+                    for (user_id, date), total in totals.items()
+                ],
+                update_conflicts=True,
+                unique_fields=['user', 'date'],
+                update_fields=['total_kcal', 'modified_at'],
+            )
+
+        empty = keys - totals.keys()
+        if empty:
+            condition = Q()
+            for user_id, date in empty:
+                condition |= Q(user_id=user_id, date=date)
+            models.DailyNutrition.objects.filter(condition).delete()
+
+# refresh_days: recalcula o total diário apenas para os pares (usuário, dia) afetados,
+# somando o total já materializado de cada refeição ativa. Dias sem refeições são removidos.
+# Os dias ficam travados (lock_days) antes da soma: duas requisições alterando refeições do mesmo dia recalculam
+# uma depois da outra, e a segunda já lê o que a primeira gravou, em vez de sobrescrever o dia com um total antigo.
+
+
+def refresh_meals(meal_ids):
+    if not isinstance(meal_ids, QuerySet):
+        meal_ids = {meal_id for meal_id in meal_ids if meal_id is not None}
+        if not meal_ids:
+            return
+
+    with transaction.atomic():
+        meals = models.Meal.objects.filter(pk__in=meal_ids)
+        days = set(meals.select_for_update().order_by('pk').values_list('user_id', 'date'))
+        meals.update(total_kcal=models.meal_total_calories(), modified_at=Now())
+        refresh_days(days)
+
+# refresh_meals: atualiza o total das refeições informadas (ids ou queryset de ids) e, em seguida,
+# os dias a que pertencem. Também atualiza modified_at, já que o total faz parte da resposta da refeição
+# (usado pelo GET condicional). As refeições são travadas (select_for_update, em ordem de id) num comando anterior
+# ao UPDATE: se outra transação estiver recalculando a mesma refeição, esta espera o commit dela e o UPDATE, já com
+# um snapshot novo, soma os itens que ela gravou.
+
+
+def rebuild():
+    with transaction.atomic():
+        models.Meal.objects.update(total_kcal=models.meal_total_calories())
+        models.DailyNutrition.objects.all().delete()
+        models.DailyNutrition.objects.bulk_create((
+            models.DailyNutrition(user_id=row['user_id'], date=row['date'], total_kcal=row['total'] or 0)
+            for row in models.Meal.active_objects.order_by().values('user_id', 'date')
+            .annotate(total=Sum('total_kcal')).iterator(chunk_size=2000)
+        ), batch_size=2000)
+
+# rebuild: reconstrói todos os totais (refeições e dias) a partir de MealFood e Food.
@@ -1,11 +1,16 @@
+from collections.abc import Mapping
+
 from rest_framework import serializers
-from core import models
+from rest_framework.authtoken.serializers import AuthTokenSerializer
+from rest_framework.settings import api_settings
+from core import metrics, models, rollups
 from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
 from rest_framework.validators import UniqueValidator
 from django.contrib.auth.password_validation import validate_password
 
-from core.models import MealFood
-
 
 class LoginSerializer(serializers.ModelSerializer):
     class Meta:
@@ -16,6 +21,89 @@ class LoginSerializer(serializers.ModelSerializer):
 # Ele expõe os campos username, first_name e last_name para leitura.
 
 
+def resolve_related(serializer, validated_data):
+    for field, queryset in serializer.get_bulk_related().items():
+        ids = {item[field]['id'] for item in validated_data}
+        objects = queryset.in_bulk(ids)
+        missing = ids - objects.keys()
+        if missing:
+            raise serializers.ValidationError({field: f"IDs não encontrados: {sorted(missing)}."})
+        for item in validated_data:
+            item[field] = objects[item[field]['id']]
+    return validated_data
+
+# resolve_related: troca os {"id": ...} aninhados dos itens pelos objetos, com um único in_bulk por campo
+# relacionado. Os querysets vêm de get_bulk_related do serializer (já restritos ao usuário autenticado quando
+# o objeto pertence a ele); IDs inexistentes ou de outro usuário geram erro de validação (400).
+# Usado nas escritas em lote, nas aninhadas e também no create/update de um único item.
+
+
+class BulkListSerializer(serializers.ListSerializer):
+    def resolve_related(self, validated_data):
+        return resolve_related(self.child, validated_data)
+
+    def create(self, validated_data):
+        model = self.child.Meta.model
+        validated_data = self.resolve_related(validated_data)
+        return model.objects.bulk_create(model(**item) for item in validated_data)
+
+    def update(self, instance, validated_data):
+        instances = {obj.pk: obj for obj in instance}
+        missing = {item.get('id') for item in validated_data} - instances.keys()
+        if missing:
+            raise serializers.ValidationError({"id": f"IDs não encontrados: {sorted(missing, key=str)}."})
+
+        validated_data = self.resolve_related(validated_data)
+        now = timezone.now()
+        fields = {'modified_at'}
+        updated = []
+        for item in validated_data:
+            obj = instances[item.pop('id')]
+            for attr, value in item.items():
+                setattr(obj, attr, value)
+                fields.add(attr)
+            obj.modified_at = now
+            updated.append(obj)
+        self.child.Meta.model.objects.bulk_update(updated, fields)
+        return updated
+
+# Serializer de lista usado nos endpoints em lote (bulk).
+# resolve_related: ver a função resolve_related, com os querysets do serializer filho.
+# create / update: gravam todos os itens com um único bulk_create / bulk_update.
+
+
+def ensure_mapping(serializer, data):
+    if not isinstance(data, Mapping):
+        message = serializer.error_messages['invalid'].format(datatype=type(data).__name__)
+        raise serializers.ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [message]}, code='invalid')
+
+
+def parse_id(value, field):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise serializers.ValidationError({field: "ID inválido."})
+
+
+def nested_id(data, field, message):
+    value = data.get(field)
+    if not isinstance(value, Mapping) or 'id' not in value:
+        raise serializers.ValidationError({field: message})
+    return parse_id(value['id'], field)
+
+
+def bulk_item_id(serializer, data):
+    if serializer.parent.instance is None:
+        raise serializers.ValidationError({'id': "Não informe o id ao criar itens; ele é gerado pelo banco."})
+    return parse_id(data['id'], 'id')
+
+# Validação dos relacionamentos enviados como {"campo": {"id": ...}} nas escritas aninhadas e em lote.
+# ensure_mapping: cada item precisa ser um objeto JSON (a mesma mensagem do DRF para os demais tipos).
+# nested_id: o campo precisa ser um objeto com id inteiro; qualquer outro formato gera erro 400, e não 500.
+# bulk_item_id: o id de um item em lote só é aceito na atualização (PUT), em que identifica o item; na criação,
+# um id enviado pelo cliente geraria conflito de chave ou ficaria fora da sequence da tabela.
+
+
 class UserProfileSerializer(serializers.ModelSerializer):
     login = LoginSerializer(many=False)
 
@@ -54,9 +142,34 @@ class ExerciseSerializer(serializers.ModelSerializer):
 #Permite o uso de um ID customizado durante operações como criação ou atualização.
 
 
+class WorkoutExerciseSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = models.TrainingExercise
+        exclude = ['created_at', 'training', 'exercise']
+        list_serializer_class = BulkListSerializer
+
+    def to_internal_value(self, data):
+        ensure_mapping(self, data)
+        exercise_id = nested_id(data, 'exercise', "ID do exercício é obrigatório.")
+
+        internal_data = super().to_internal_value(data)
+        internal_data['exercise'] = {'id': exercise_id}
+        if data.get('id') is not None:
+            internal_data['id'] = parse_id(data['id'], 'id')
+        return internal_data
+
+    def get_bulk_related(self):
+        return {'exercise': models.Exercise.active_objects.all()}
+
+# Exercício de um treino enviado junto com o próprio treino (campo exercises do TrainingSerializer).
+# Recebe {"exercise": {"id": ...}, "repetitions": ..., "series": ..., "rest_time": ...} e, na atualização,
+# opcionalmente o id do exercício do treino já existente.
+
+
 class TrainingSerializer(serializers.ModelSerializer):
     id = serializers.IntegerField(read_only=True)
     user = LoginSerializer(many=False, required=False, read_only=True)
+    exercises = WorkoutExerciseSerializer(many=True, required=False, write_only=True)
 
     class Meta:
         model = models.Training
@@ -69,6 +182,64 @@ class TrainingSerializer(serializers.ModelSerializer):
 # Inclui os dados do usuário (LoginSerializer) de forma aninhada.
 # Permite o uso de um ID customizado para operações específicas.
 
+    def create(self, validated_data):
+        exercises = validated_data.pop('exercises', None)
+        with transaction.atomic():
+            training = super().create(validated_data)
+            if exercises:
+                self.save_exercises(training, exercises, created=True)
+        return training
+
+    def update(self, instance, validated_data):
+        exercises = validated_data.pop('exercises', None)
+        with transaction.atomic():
+            training = super().update(instance, validated_data)
+            if exercises is not None:
+                self.save_exercises(training, exercises)
+        return training
+
+    def save_exercises(self, training, exercises, created=False):
+        exercises = self.fields['exercises'].resolve_related(exercises)
+        current = {} if created else {
+            obj.pk: obj for obj in models.TrainingExercise.active_objects.filter(training=training)
+        }
+        missing = {item['id'] for item in exercises if 'id' in item} - current.keys()
+        if missing:
+            raise serializers.ValidationError({"exercises": f"IDs não encontrados: {sorted(missing)}."})
+
+        now = timezone.now()
+        new, updated, fields = [], [], {'modified_at'}
+        for item in exercises:
+            obj = current.pop(item.pop('id', None), None)
+            if obj is None:
+                new.append(models.TrainingExercise(training=training, **item))
+                continue
+            changed = {
+                attr for attr, value in item.items()
+                if (obj.exercise_id != value.pk if attr == 'exercise' else getattr(obj, attr) != value)
+            }
+            if changed:
+                for attr in changed:
+                    setattr(obj, attr, item[attr])
+                obj.modified_at = now
+                fields |= changed
+                updated.append(obj)
+
+        if new:
+            models.TrainingExercise.objects.bulk_create(new)
+        if updated:
+            models.TrainingExercise.objects.bulk_update(updated, fields)
+        if current:
+            models.TrainingExercise.objects.filter(pk__in=current).update(active=False, modified_at=now)
+
+    # create / update:
+    # Aceitam a lista exercises para gravar o treino inteiro numa única chamada e numa única transação:
+    # um INSERT para o treino e um bulk INSERT para os exercícios, com os IDs dos exercícios resolvidos
+    # numa única consulta. No update, se exercises for enviado, a lista passa a ser a do treino: itens com id
+    # são atualizados (só se algo mudou), itens sem id são criados e os que ficaram de fora são inativados
+    # (active=False e modified_at atualizado), como no DELETE, para aparecerem como removidos no /api/sync/.
+    # O exercício de cada item é comparado pelo exercise_id, sem carregar o exercício de cada linha existente.
+
 
 class TrainingExerciseSerializer(serializers.ModelSerializer):
     exercise = ExerciseSerializer(many=False, read_only=True)
@@ -77,25 +248,21 @@ class TrainingExerciseSerializer(serializers.ModelSerializer):
     class Meta:
         model = models.TrainingExercise
         exclude = ['created_at']
+        list_serializer_class = BulkListSerializer
 
 # Serializa os dados do modelo TrainingExercise (relação entre treino e exercício).
 # Inclui os dados do exercício e do treino de forma aninhada.
 
     def create(self, validated_data):
-        exercise = models.Exercise.objects.get(id=validated_data.pop('exercise').get("id"))
-        training = models.Training.objects.get(id=validated_data.pop('training').get("id"))
-
-        return models.TrainingExercise.objects.create(
-            exercise=exercise, training=training, **validated_data
-        )
+        validated_data, = resolve_related(self, [validated_data])
+        return models.TrainingExercise.objects.create(**validated_data)
 
     # create:
     # Recebe os IDs de exercise e training no corpo da requisição.
-    # Recupera os objetos correspondentes no banco e cria um TrainingExercise.
+    # Recupera os objetos correspondentes no banco (o treino precisa ser do usuário) e cria um TrainingExercise.
 
     def update(self, instance, validated_data):
-        instance.exercise = models.Exercise.objects.get(id=validated_data.pop('exercise').get("id"))
-        instance.training = models.Training.objects.get(id=validated_data.pop('training').get("id"))
+        validated_data, = resolve_related(self, [validated_data])
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
         instance.save()
@@ -105,22 +272,30 @@ class TrainingExerciseSerializer(serializers.ModelSerializer):
     # Atualiza um TrainingExercise existente com base nos IDs fornecidos.
 
     def to_internal_value(self, data):
-        exercise_data = data.get('exercise')
-        training_data = data.get('training')
-
-        if not exercise_data or 'id' not in exercise_data:
-            raise serializers.ValidationError({"exercise": "ID do exercício é obrigatório."})
-        if not training_data or 'id' not in training_data:
-            raise serializers.ValidationError({"training": "ID do treino é obrigatório."})
+        ensure_mapping(self, data)
+        exercise_id = nested_id(data, 'exercise', "ID do exercício é obrigatório.")
+        training_id = nested_id(data, 'training', "ID do treino é obrigatório.")
 
         internal_data = super().to_internal_value(data)
-        internal_data['exercise'] = exercise_data
-        internal_data['training'] = training_data
+        internal_data['exercise'] = {'id': exercise_id}
+        internal_data['training'] = {'id': training_id}
+        if self.parent is not None and 'id' in data:
+            internal_data['id'] = bulk_item_id(self, data)
         return internal_data
 
+    def get_bulk_related(self):
+        return {
+            'exercise': models.Exercise.active_objects.all(),
+            'training': models.Training.active_objects.filter(user=self.context['request'].user),
+        }
+
     # to_internal_value:
     # Valida se os dados aninhados de exercise e training contêm os IDs necessários.
     # Converte os dados JSON recebidos para um formato interno utilizado pelo serializer.
+    # Em lote (many=True) também mantém o id do item, usado na atualização (e recusado na criação).
+
+    # get_bulk_related: querysets usados pelo BulkListSerializer para resolver os IDs em lote.
+    # Só aceita treinos do usuário autenticado.
 
 
 class MealSerializer(serializers.ModelSerializer):
@@ -129,27 +304,35 @@ class MealSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = models.Meal
-        exclude = ['created_at', 'user']
+        exclude = ['created_at', 'user', 'total_kcal']
         extra_kwargs = {
             'id': {'read_only': False}
         }
 
 # Serializa os dados do modelo Meal (refeição).
-# Os campos created_at e user não serão incluídos nem no JSON de saída, nem no JSON de entrada.
+# Os campos created_at, user e total_kcal (total materializado, mantido pelos signals) não serão incluídos
+# nem no JSON de saída, nem no JSON de entrada.
 # Isso é útil para ocultar informações que não precisam ser manipuladas diretamente pela API.
 # Calcula as calorias totais de uma refeição com base nos alimentos associados.
 
     def get_total_calories(self, obj):
-        meal_foods = MealFood.objects.filter(meal=obj)
-        resultado = 0
+        total_calories = getattr(obj, 'total_calories', None)
+        if total_calories is None:
+            total_calories = models.Meal.objects.with_total_calories().filter(pk=obj.pk).values_list(
+                'total_calories', flat=True
+            ).first()
+        return total_calories or 0
 
-        for meal_food in meal_foods:
-            if meal_food.value <= 0 or meal_food.food.value <= 0:
-                continue
-            total_food = (meal_food.value / meal_food.food.value) * meal_food.food.total_kcal
-            resultado += total_food
+# get_total_calories: usa o total anotado pelo queryset (with_total_calories) quando disponível.
+# Caso a refeição não venha anotada (ex.: resposta de create/update), calcula o total com uma única consulta.
 
-        return resultado
+
+class DailyNutritionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = models.DailyNutrition
+        exclude = ['created_at', 'user']
+
+# Serializa o resumo diário de calorias do usuário (somente leitura).
 
 
 class FoodSerializer(serializers.ModelSerializer):
@@ -165,6 +348,22 @@ class FoodSerializer(serializers.ModelSerializer):
 #Serializa os dados do modelo Food (alimento).
 
 
+class MealFoodListSerializer(BulkListSerializer):
+    def create(self, validated_data):
+        instances = super().create(validated_data)
+        rollups.refresh_meals({obj.meal_id for obj in instances})
+        return instances
+
+    def update(self, instance, validated_data):
+        previous_meal_ids = {obj.meal_id for obj in instance}
+        instances = super().update(instance, validated_data)
+        rollups.refresh_meals(previous_meal_ids | {obj.meal_id for obj in instances})
+        return instances
+
+# bulk_create / bulk_update não disparam os signals de MealFood, então os totais materializados
+# (core/rollups.py) das refeições afetadas são atualizados aqui, uma vez por lote.
+
+
 class MealFoodSerializer(serializers.ModelSerializer):
     meal = MealSerializer(many=False, read_only=True)
     food = FoodSerializer(many=False, read_only=True)
@@ -172,45 +371,78 @@ class MealFoodSerializer(serializers.ModelSerializer):
     class Meta:
         model = models.MealFood
         exclude = ['created_at']
+        list_serializer_class = MealFoodListSerializer
 
 # Serializa a relação entre Meal e Food.
 
     def create(self, validated_data):
-        meal = models.Meal.objects.get(id=validated_data.pop('meal').get("id"))
-        food = models.Food.objects.get(id=validated_data.pop('food').get("id"))
-
-        return models.MealFood.objects.create(
-            meal=meal, food=food, **validated_data
-        )
+        validated_data, = resolve_related(self, [validated_data])
+        return models.MealFood.objects.create(**validated_data)
 
     def update(self, instance, validated_data):
-        instance.meal = models.Meal.objects.get(id=validated_data.pop('meal').get("id"))
-        instance.food = models.Food.objects.get(id=validated_data.pop('food').get("id"))
+        validated_data, = resolve_related(self, [validated_data])
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
         instance.save()
         return instance
 
     def to_internal_value(self, data):
-        meal_data = data.get('meal')
-        food_data = data.get('food')
-
-        if not meal_data or 'id' not in meal_data:
-            raise serializers.ValidationError({"meal": "ID do meal é obrigatório."})
-        if not food_data or 'id' not in food_data:
-            raise serializers.ValidationError({"food": "ID do food é obrigatório."})
+        ensure_mapping(self, data)
+        meal_id = nested_id(data, 'meal', "ID do meal é obrigatório.")
+        food_id = nested_id(data, 'food', "ID do food é obrigatório.")
 
         internal_data = super().to_internal_value(data)
-        internal_data['meal'] = meal_data
-        internal_data['food'] = food_data
+        internal_data['meal'] = {'id': meal_id}
+        internal_data['food'] = {'id': food_id}
+        if self.parent is not None and 'id' in data:
+            internal_data['id'] = bulk_item_id(self, data)
         return internal_data
 
+    def get_bulk_related(self):
+        return {
+            'meal': models.Meal.active_objects.filter(user=self.context['request'].user),
+            'food': models.Food.active_objects.all(),
+        }
+
 # create e update:
-# Recuperam os objetos Meal e Food e criam/atualizam a relação.
+# Recuperam os objetos Meal (do usuário) e Food e criam/atualizam a relação.
 
 # to_internal_value:
 # Valida se os IDs de meal e food foram fornecidos corretamente.
 
+# get_bulk_related: querysets usados pelo BulkListSerializer para resolver os IDs em lote.
+# Só aceita refeições do usuário autenticado.
+
+
+class SyncTrainingSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = models.Training
+        exclude = ['created_at', 'user']
+
+
+class SyncTrainingExerciseSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = models.TrainingExercise
+        exclude = ['created_at']
+
+
+class SyncMealFoodSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = models.MealFood
+        exclude = ['created_at']
+
+# Serializers usados pelo /api/sync/: os relacionamentos saem apenas como id,
+# já que treinos e refeições chegam ao cliente no mesmo payload.
+
+
+class CredentialsSerializer(AuthTokenSerializer):
+    def validate(self, attrs):
+        with metrics.timer('login.authenticate_seconds'):
+            return super().validate(attrs)
+
+# Valida usuário e senha do login com o AuthTokenSerializer do DRF (authenticate() do Django, com os
+# AUTHENTICATION_BACKENDS e o signal user_login_failed), medindo a duração em login.authenticate_seconds.
+
 
 class RegisterSerializer(serializers.ModelSerializer):
     email = serializers.EmailField(required=True, validators=[UniqueValidator(queryset=User.objects.all())])
@@ -1,10 +1,125 @@
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 from rest_framework.authtoken.models import Token
 
+from core import cache, metrics, rollups
+from core.authentication import forget_tokens
+from core.models import Exercise, Food, Meal, MealFood, MuscleGroup, SyncTombstone, Training, TrainingExercise
+
 
 @receiver(post_save, sender=User)
 def create_auth_token(sender, instance=None, created=False, **kwargs):
     if created:
         Token.objects.create(user=instance)
+
+
+connection_created.connect(metrics.install_query_recorder)
+
+# Toda conexão nova com o banco passa a contar consultas e tempo de SQL por requisição (core/metrics.py).
+
+
+@receiver(post_delete, sender=Token)
+def forget_deleted_token(sender, instance, **kwargs):
+    forget_tokens([instance.key])
+
+
+@receiver(post_save, sender=User)
+def forget_user_tokens(sender, instance, created=False, **kwargs):
+    if not created:
+        forget_tokens(Token.objects.filter(user=instance).values_list('key', flat=True))
+
+# Remove do cache de autenticação o token apagado e os tokens de um usuário alterado
+# (por exemplo, desativado), para que a próxima requisição volte a validar no banco.
+
+
+@receiver(pre_save, sender=MealFood)
+def store_previous_meal(sender, instance, **kwargs):
+    instance._previous_meal_id = None
+    if instance.pk:
+        instance._previous_meal_id = MealFood.objects.filter(pk=instance.pk).values_list('meal_id', flat=True).first()
+
+
+@receiver(post_save, sender=MealFood)
+def refresh_meal_food_rollup(sender, instance, **kwargs):
+    rollups.refresh_meals({instance.meal_id, getattr(instance, '_previous_meal_id', None)})
+
+
+@receiver(post_delete, sender=MealFood)
+def refresh_deleted_meal_food_rollup(sender, instance, **kwargs):
+    rollups.refresh_meals({instance.meal_id})
+
+# Ao criar, alterar ou remover um item de refeição, recalcula o total daquela refeição (e da anterior,
+# caso o item tenha sido movido) e o total dos dias correspondentes.
+
+
+@receiver(pre_save, sender=Meal)
+def store_previous_day(sender, instance, **kwargs):
+    instance._previous_day = None
+    if instance.pk:
+        instance._previous_day = Meal.objects.filter(pk=instance.pk).values_list('user_id', 'date').first()
+
+
+@receiver(post_save, sender=Meal)
+def refresh_meal_day_rollup(sender, instance, **kwargs):
+    days = {(instance.user_id, instance.date)}
+    if getattr(instance, '_previous_day', None):
+        days.add(instance._previous_day)
+    rollups.refresh_days(days)
+
+
+@receiver(post_delete, sender=Meal)
+def refresh_deleted_meal_day_rollup(sender, instance, **kwargs):
+    rollups.refresh_days({(instance.user_id, instance.date)})
+
+# Ao criar, alterar ou remover uma refeição, recalcula o total do dia (e do dia anterior, caso a data mude).
+
+
+@receiver(pre_save, sender=Food)
+def store_previous_nutrition(sender, instance, **kwargs):
+    instance._previous_nutrition = None
+    if instance.pk:
+        instance._previous_nutrition = Food.objects.filter(pk=instance.pk).values_list('total_kcal', 'value').first()
+
+
+@receiver(post_save, sender=Food)
+def refresh_food_rollup(sender, instance, created=False, **kwargs):
+    previous = getattr(instance, '_previous_nutrition', None)
+    if created or previous is None or previous == (instance.total_kcal, instance.value):
+        return
+    rollups.refresh_meals(MealFood.objects.filter(food=instance).values('meal_id'))
+
+# Quando as calorias ou a porção de referência de um alimento mudam, recalcula apenas
+# as refeições que usam esse alimento.
+
+
+@receiver(post_save, sender=Food)
+@receiver(post_delete, sender=Food)
+@receiver(post_save, sender=Exercise)
+@receiver(post_delete, sender=Exercise)
+@receiver(post_save, sender=MuscleGroup)
+@receiver(post_delete, sender=MuscleGroup)
+def bump_catalog_version(sender, **kwargs):
+    cache.bump_version(sender)
+
+# Qualquer escrita em um catálogo invalida as respostas em cache daquele modelo (core/cache.py).
+
+
+@receiver(post_delete, sender=Training)
+@receiver(post_delete, sender=Meal)
+@receiver(post_delete, sender=TrainingExercise)
+@receiver(post_delete, sender=MealFood)
+def record_sync_tombstone(sender, instance, **kwargs):
+    if sender is TrainingExercise:
+        user_id = Training.objects.filter(pk=instance.training_id).values_list('user_id', flat=True).first()
+    elif sender is MealFood:
+        user_id = Meal.objects.filter(pk=instance.meal_id).values_list('user_id', flat=True).first()
+    else:
+        user_id = instance.user_id
+    if user_id is not None:
+        SyncTombstone.objects.create(user_id=user_id, table=sender._meta.db_table, object_id=instance.pk)
+
+# Remoções definitivas (não só o DELETE da API, que apenas inativa) ficam registradas para o /api/sync/.
+# Numa cascata o Django apaga os filhos antes dos pais, então o treino/refeição ainda existe quando o
+# exercício/item é removido.
@@ -1,3 +1,1032 @@
-from django.test import TestCase
+import asyncio
+import datetime
+import io
+import json
+import threading
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import hashers
+from django.contrib.auth.signals import user_login_failed
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import AsyncClient, override_settings
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase, APITransactionTestCase
+
+from core import filters, imports, metrics, models, rollups
+
+
+class TrainingExerciseViewSetTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='atleta@dailyfit.com')
+        self.client.force_authenticate(self.user)
+        muscle_group = models.MuscleGroup.objects.create(name='Peitoral')
+        exercises = models.Exercise.objects.bulk_create(
+            models.Exercise(name=f'Exercício {i}', muscle_group=muscle_group) for i in range(10)
+        )
+        self.trainings = models.Training.objects.bulk_create(
+            models.Training(user=self.user, name=f'Treino {i}', date=datetime.date(2024, 1, 1 + i)) for i in range(5)
+        )
+        models.TrainingExercise.objects.bulk_create(
+            models.TrainingExercise(
+                exercise=exercises[i % 10],
+                training=self.trainings[i % 5],
+                repetitions=10,
+                series=3,
+                rest_time=datetime.timedelta(seconds=60),
+            )
+            for i in range(500)
+        )
+
+    def test_list_runs_a_fixed_number_of_queries(self):
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/training-exercise/', {'page_size': 500})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 500)
+
+    def test_list_by_training_runs_a_fixed_number_of_queries(self):
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/training-exercise/', {'training': self.trainings[0].id, 'page_size': 500})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 100)
+
+
+class MealFoodViewSetTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='dieta@dailyfit.com')
+        self.client.force_authenticate(self.user)
+        foods = models.Food.objects.bulk_create(
+            models.Food(description=f'Alimento {i}', total_kcal=100 + i, value=100) for i in range(10)
+        )
+        self.meals = models.Meal.objects.bulk_create(
+            models.Meal(user=self.user, date=datetime.date(2024, 1, 1 + i), meal_type=1) for i in range(20)
+        )
+        models.MealFood.objects.bulk_create(
+            models.MealFood(meal=self.meals[i % 20], food=foods[i % 10], value=50) for i in range(500)
+        )
+
+    def test_list_runs_a_fixed_number_of_queries(self):
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/meal-food/', {'page_size': 500})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 500)
+
+    def test_list_by_meal_includes_meal_total_calories(self):
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/meal-food/', {'diet': self.meals[0].id, 'page_size': 500})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 25)
+        expected = sum((100 + i % 10) * 0.5 for i in range(0, 500, 20))
+        self.assertAlmostEqual(response.data['results'][0]['meal']['total_calories'], expected)
+
+
+
+class MealViewSetTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='refeicoes@dailyfit.com')
+        self.client.force_authenticate(self.user)
+        foods = models.Food.objects.bulk_create(
+            models.Food(description=f'Alimento lista {i}', total_kcal=100 + i, value=100) for i in range(4)
+        )
+        meals = models.Meal.objects.bulk_create(
+            models.Meal(user=self.user, date=datetime.date(2024, 1, 1) + datetime.timedelta(days=i), meal_type=1)
+            for i in range(50)
+        )
+        models.MealFood.objects.bulk_create(
+            models.MealFood(meal=meal, food=food, value=10 * (i + 1))
+            for i, meal in enumerate(meals) for food in foods
+        )
+        self.expected = {meal.pk: sum((100 + j) * (i + 1) / 10 for j in range(4)) for i, meal in enumerate(meals)}
+
+    def test_list_runs_a_fixed_number_of_queries(self):
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/meal/', {'page_size': 50})
+        self.assertEqual(response.status_code, 200)
+        results = response.data['results']
+        self.assertEqual(len(results), 50)
+        for meal in results:
+            self.assertAlmostEqual(meal['total_calories'], self.expected[meal['id']])
+
+
+class TrainingFilterTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='historico@dailyfit.com')
+        self.client.force_authenticate(self.user)
+        models.Training.objects.bulk_create(
+            models.Training(
+                user=self.user,
+                name=['Treino de Peito', 'Treino de Costas', 'Pernas e Glúteos'][i % 3],
+                date=datetime.date(2024, 1, 1) + datetime.timedelta(days=i),
+            )
+            for i in range(90)
+        )
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE training')
+            cursor.execute('SET LOCAL enable_seqscan = off')
+
+    def filter(self, data):
+        return filters.TrainingFilter(data, queryset=models.Training.active_objects.filter(user=self.user)).qs
+
+    def test_date_range_uses_user_date_index(self):
+        queryset = self.filter({'date_after': '2024-02-01', 'date_before': '2024-02-29'})
+        self.assertEqual(queryset.count(), 29)
+        self.assertIn('training_active_user_date_idx', queryset.explain())
+
+    def test_inactive_trainings_are_hidden(self):
+        models.Training.objects.filter(user=self.user, date__month=1).update(active=False)
+        response = self.client.get('/api/training/', {'date_before': '2024-02-29'})
+        self.assertEqual(len(response.data['results']), 29)
+        self.assertEqual(models.Training.objects.filter(user=self.user).count(), 90)
+
+    def test_name_search_ignores_accents_and_uses_trigram_index(self):
+        self.assertEqual(self.filter({'name': 'GLUTEOS'}).count(), 30)
+        self.assertIn('training_name_trgm_idx', models.Training.objects.search('GLUTEOS').explain())
+
+    def test_list_ordering_by_date(self):
+        response = self.client.get('/api/training/', {'ordering': 'date', 'date_after': '2024-03-01'})
+        self.assertEqual(response.status_code, 200)
+        dates = [training['date'] for training in response.data['results']]
+        self.assertEqual(dates, sorted(dates))
+        self.assertEqual(dates[0], '2024-03-01')
+
+
+class MealDailySummaryTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='resumo@dailyfit.com')
+        self.client.force_authenticate(self.user)
+        rice = models.Food.objects.create(description='Arroz', total_kcal=130, value=100)
+        egg = models.Food.objects.create(description='Ovo', total_kcal=70, value=1)
+        for day in range(1, 31):
+            breakfast = models.Meal.objects.create(user=self.user, date=datetime.date(2024, 4, day), meal_type=1)
+            lunch = models.Meal.objects.create(user=self.user, date=datetime.date(2024, 4, day), meal_type=3)
+            models.MealFood.objects.create(meal=breakfast, food=egg, value=2)
+            models.MealFood.objects.create(meal=lunch, food=rice, value=200)
+            models.MealFood.objects.create(meal=lunch, food=egg, value=0)
+
+    def test_month_summary_runs_a_single_query(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/meal/daily-summary/', {'from': '2024-04-01', 'to': '2024-04-30'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 30)
+        self.assertEqual(response.data[0]['total_calories'], 400)
+        self.assertEqual(response.data[0]['meals'], [
+            {'meal_type': 1, 'total_calories': 140},
+            {'meal_type': 3, 'total_calories': 260},
+        ])
+
+    def test_invalid_period(self):
+        response = self.client.get('/api/meal/daily-summary/', {'from': '2024-04-30', 'to': '2024-02-30'})
+        self.assertEqual(response.status_code, 400)
+
+
+class NutritionRollupTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='rollup@dailyfit.com')
+        self.rice = models.Food.objects.create(description='Arroz rollup', total_kcal=130, value=100)
+        self.egg = models.Food.objects.create(description='Ovo rollup', total_kcal=70, value=1)
+        self.lunch = models.Meal.objects.create(user=self.user, date=datetime.date(2024, 6, 1), meal_type=3)
+        self.dinner = models.Meal.objects.create(user=self.user, date=datetime.date(2024, 6, 2), meal_type=4)
+        self.item = models.MealFood.objects.create(meal=self.lunch, food=self.rice, value=200)
+        models.MealFood.objects.create(meal=self.lunch, food=self.egg, value=2)
+        models.MealFood.objects.create(meal=self.dinner, food=self.egg, value=1)
+
+    def assertTotals(self, meals, days):
+        for meal, total in zip([self.lunch, self.dinner], meals):
+            meal.refresh_from_db()
+            self.assertAlmostEqual(meal.total_kcal, total)
+        self.assertEqual(dict(models.DailyNutrition.objects.filter(user=self.user).values_list('date', 'total_kcal')),
+                         {datetime.date(2024, 6, day): total for day, total in days.items()})
+
+    def test_item_writes_refresh_meal_and_day(self):
+        self.assertTotals([400, 70], {1: 400, 2: 70})
+        self.item.value = 100
+        self.item.save()
+        self.assertTotals([270, 70], {1: 270, 2: 70})
+
+    def test_food_nutrition_change_refreshes_meals_using_it(self):
+        self.rice.total_kcal = 260
+        self.rice.save()
+        self.assertTotals([660, 70], {1: 660, 2: 70})
+        self.rice.description = 'Arroz rollup integral'
+        self.rice.save()
+        self.assertTotals([660, 70], {1: 660, 2: 70})
+
+    def test_item_moved_to_a_meal_on_another_day(self):
+        self.item.meal = self.dinner
+        self.item.save()
+        self.assertTotals([140, 330], {1: 140, 2: 330})
+
+    def test_meal_moved_to_another_day(self):
+        dinner = models.Meal.objects.get(pk=self.dinner.pk)
+        dinner.date = datetime.date(2024, 6, 1)
+        dinner.save()
+        self.assertTotals([400, 70], {1: 470})
+
+    def test_deletes_refresh_meal_and_day(self):
+        self.item.delete()
+        self.assertTotals([140, 70], {1: 140, 2: 70})
+        self.dinner.delete()
+        self.assertEqual(dict(models.DailyNutrition.objects.filter(user=self.user).values_list('date', 'total_kcal')),
+                         {datetime.date(2024, 6, 1): 140})
+
+
+class NutritionRollupLockTest(APITransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='trava@dailyfit.com')
+        self.food = models.Food.objects.create(description='Arroz trava', total_kcal=100, value=100)
+        self.meal = models.Meal.objects.create(user=self.user, date=datetime.date(2024, 6, 1), meal_type=3)
+        models.MealFood.objects.create(meal=self.meal, food=self.food, value=100)
+
+    def in_thread(self, target):
+        def run():
+            try:
+                target()
+            finally:
+                connection.close()
+        thread = threading.Thread(target=run)
+        thread.start()
+        return thread
+
+    def test_refresh_waits_for_the_day_lock(self):
+        locked, release = threading.Event(), threading.Event()
+
+        def hold_day():
+            with transaction.atomic():
+                rollups.lock_days({(self.user.pk, self.meal.date)})
+                locked.set()
+                release.wait(5)
+
+        holder = self.in_thread(hold_day)
+        self.assertTrue(locked.wait(5))
+        writer = self.in_thread(lambda: models.MealFood.objects.create(meal=self.meal, food=self.food, value=100))
+        writer.join(0.3)
+        self.assertTrue(writer.is_alive())
+        release.set()
+        holder.join(5)
+        writer.join(5)
+        self.assertEqual(models.DailyNutrition.objects.get(user=self.user).total_kcal, 200)
+
+
+class BulkEndpointsTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='lote@dailyfit.com')
+        self.client.force_authenticate(self.user)
+        self.foods = models.Food.objects.bulk_create(
+            models.Food(description=f'Alimento {i}', total_kcal=100, value=100) for i in range(20)
+        )
+        self.meal = models.Meal.objects.create(user=self.user, date=datetime.date(2024, 5, 1), meal_type=3)
+        muscle_group = models.MuscleGroup.objects.create(name='Costas')
+        self.exercises = models.Exercise.objects.bulk_create(
+            models.Exercise(name=f'Exercício {i}', muscle_group=muscle_group) for i in range(20)
+        )
+        self.training = models.Training.objects.create(user=self.user, name='Costas', date=datetime.date(2024, 5, 1))
+
+    def test_meal_food_bulk_create_and_update(self):
+        payload = [{'meal': {'id': self.meal.id}, 'food': {'id': food.id}, 'value': 50} for food in self.foods]
+        with self.assertNumQueries(14):
+            response = self.client.post('/api/meal-food/bulk/', payload, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data), 20)
+        self.assertEqual(response.data[0]['meal']['total_calories'], 1000)
+        self.assertEqual(models.DailyNutrition.objects.get(user=self.user).total_kcal, 1000)
+
+        payload = [
+            {'id': item['id'], 'meal': {'id': self.meal.id}, 'food': {'id': item['food']['id']}, 'value': 100}
+            for item in response.data
+        ]
+        response = self.client.put('/api/meal-food/bulk/', payload, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(models.DailyNutrition.objects.get(user=self.user).total_kcal, 2000)
+
+    def test_meal_food_bulk_rejects_meals_of_other_users(self):
+        other = models.Meal.objects.create(
+            user=User.objects.create(username='outro@dailyfit.com'), date=datetime.date(2024, 5, 1), meal_type=1
+        )
+        payload = [{'meal': {'id': other.id}, 'food': {'id': self.foods[0].id}, 'value': 50}]
+        response = self.client.post('/api/meal-food/bulk/', payload, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(models.MealFood.objects.exists())
+
+    def test_bulk_update_rejects_items_of_other_users(self):
+        other = User.objects.create(username='outro@dailyfit.com')
+        other_training = models.Training.objects.create(user=other, name='Outro', date=datetime.date(2024, 5, 1))
+        item = models.TrainingExercise.objects.create(training=other_training, exercise=self.exercises[0],
+                                                      repetitions=10, series=3, rest_time=datetime.timedelta(60))
+        payload = [{'id': item.id, 'training': {'id': self.training.id}, 'exercise': {'id': self.exercises[0].id},
+                    'repetitions': 1, 'series': 1, 'rest_time': '00:01:00'}]
+        response = self.client.put('/api/training-exercise/bulk/', payload, format='json')
+        self.assertIn(response.status_code, (400, 404))
+        item.refresh_from_db()
+        self.assertEqual((item.training_id, item.repetitions), (other_training.id, 10))
+
+        other_meal = models.Meal.objects.create(user=other, date=datetime.date(2024, 5, 1), meal_type=1)
+        meal_food = models.MealFood.objects.create(meal=other_meal, food=self.foods[0], value=50)
+        payload = [{'id': meal_food.id, 'meal': {'id': self.meal.id}, 'food': {'id': self.foods[0].id}, 'value': 1}]
+        response = self.client.put(f'/api/meal-food/bulk/?diet={other_meal.id}', payload, format='json')
+        self.assertIn(response.status_code, (400, 404))
+        meal_food.refresh_from_db()
+        self.assertEqual((meal_food.meal_id, meal_food.value), (other_meal.id, 50))
+
+    def test_bulk_rejects_malformed_items(self):
+        for path, payload in [
+            ('/api/training-exercise/bulk/', ['x']),
+            ('/api/training-exercise/bulk/', [{'exercise': 5, 'training': {'id': self.training.id}}]),
+            ('/api/training-exercise/bulk/', [{'exercise': {'id': 'abc'}, 'training': {'id': self.training.id}}]),
+            ('/api/meal-food/bulk/', [1]),
+            ('/api/meal-food/bulk/', [{'meal': [self.meal.id], 'food': {'id': self.foods[0].id}}]),
+            ('/api/meal-food/bulk/', [{'meal': {'id': self.meal.id}, 'food': 'x'}]),
+        ]:
+            with self.subTest(path=path, payload=payload):
+                self.assertEqual(self.client.post(path, payload, format='json').status_code, 400)
+                self.assertEqual(self.client.put(path, payload, format='json').status_code, 400)
+
+    def test_bulk_create_rejects_client_ids(self):
+        item = models.TrainingExercise.objects.create(training=self.training, exercise=self.exercises[0],
+                                                      repetitions=10, series=3, rest_time=datetime.timedelta(60))
+        for item_id in (item.id, item.id + 1000):
+            payload = [{'id': item_id, 'training': {'id': self.training.id}, 'exercise': {'id': self.exercises[1].id},
+                        'repetitions': 1, 'series': 1, 'rest_time': '00:01:00'}]
+            response = self.client.post('/api/training-exercise/bulk/', payload, format='json')
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('id', response.data[0])
+        payload = [{'id': 999999, 'meal': {'id': self.meal.id}, 'food': {'id': self.foods[0].id}, 'value': 50}]
+        self.assertEqual(self.client.post('/api/meal-food/bulk/', payload, format='json').status_code, 400)
+        self.assertEqual(models.TrainingExercise.objects.count(), 1)
+        self.assertFalse(models.MealFood.objects.exists())
+
+    def test_single_item_writes_are_scoped_to_the_user(self):
+        other = User.objects.create(username='outro@dailyfit.com')
+        other_meal = models.Meal.objects.create(user=other, date=datetime.date(2024, 5, 1), meal_type=1)
+        other_training = models.Training.objects.create(user=other, name='Outro', date=datetime.date(2024, 5, 1))
+        for meal_id in (other_meal.id, 999999):
+            response = self.client.post('/api/meal-food/', {'meal': {'id': meal_id}, 'food': {'id': self.foods[0].id},
+                                                            'value': 50}, format='json')
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('meal', response.data)
+        for training_id in (other_training.id, 999999):
+            response = self.client.post('/api/training-exercise/', {
+                'training': {'id': training_id}, 'exercise': {'id': self.exercises[0].id},
+                'repetitions': 1, 'series': 1, 'rest_time': '00:01:00',
+            }, format='json')
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('training', response.data)
+        self.assertFalse(models.MealFood.objects.exists())
+
+        item = models.MealFood.objects.create(meal=self.meal, food=self.foods[0], value=50)
+        response = self.client.put(f'/api/meal-food/{item.id}/', {'meal': {'id': other_meal.id},
+                                                                  'food': {'id': self.foods[0].id}, 'value': 1},
+                                   format='json')
+        self.assertEqual(response.status_code, 400)
+        item.refresh_from_db()
+        self.assertEqual((item.meal_id, item.value), (self.meal.id, 50))
+
+        response = self.client.post('/api/meal-food/', {'meal': {'id': self.meal.id}, 'food': {'id': self.foods[1].id},
+                                                        'value': 100}, format='json')
+        self.assertEqual(response.status_code, 201)
+
+    def test_training_exercise_bulk_create(self):
+        payload = [
+            {
+                'training': {'id': self.training.id},
+                'exercise': {'id': exercise.id},
+                'repetitions': 12,
+                'series': 4,
+                'rest_time': '00:01:00',
+            }
+            for exercise in self.exercises
+        ]
+        with self.assertNumQueries(6):
+            response = self.client.post('/api/training-exercise/bulk/', payload, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(models.TrainingExercise.objects.filter(training=self.training).count(), 20)
+
+
+class TrainingNestedWriteTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='treino@dailyfit.com')
+        self.client.force_authenticate(self.user)
+        muscle_group = models.MuscleGroup.objects.create(name='Pernas')
+        self.exercises = models.Exercise.objects.bulk_create(
+            models.Exercise(name=f'Exercício {i}', muscle_group=muscle_group) for i in range(8)
+        )
+
+    def payload(self, exercises):
+        return {
+            'name': 'Treino de Pernas',
+            'date': '2024-06-01',
+            'exercises': [
+                {'exercise': {'id': exercise.id}, 'repetitions': 10, 'series': 4, 'rest_time': '00:01:30'}
+                for exercise in exercises
+            ],
+        }
+
+    def test_create_training_with_exercises(self):
+        with self.assertNumQueries(5):
+            response = self.client.post('/api/training/', self.payload(self.exercises), format='json')
+        self.assertEqual(response.status_code, 201)
+        training = models.Training.objects.get(pk=response.data['id'])
+        self.assertEqual(training.user, self.user)
+        self.assertEqual(training.trainingexercise_set.count(), 8)
+
+    def test_unknown_exercise_rolls_back_training(self):
+        payload = self.payload(self.exercises)
+        payload['exercises'][0]['exercise']['id'] = 0
+        response = self.client.post('/api/training/', payload, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(models.Training.objects.exists())
+
+    def test_malformed_exercises_are_rejected(self):
+        for exercises in (['x'], [{'exercise': 5}], [{'exercise': {'id': None}}], 'x'):
+            with self.subTest(exercises=exercises):
+                payload = {**self.payload([]), 'exercises': exercises}
+                self.assertEqual(self.client.post('/api/training/', payload, format='json').status_code, 400)
+        self.assertFalse(models.Training.objects.exists())
+
+    def test_update_replaces_exercises(self):
+        response = self.client.post('/api/training/', self.payload(self.exercises), format='json')
+        response = self.client.put(
+            f"/api/training/{response.data['id']}/", self.payload(self.exercises[:3]), format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(models.TrainingExercise.active_objects.filter(training_id=response.data['id']).count(), 3)
+        self.assertEqual(models.TrainingExercise.objects.filter(training_id=response.data['id']).count(), 11)
+
+    def test_update_diffs_exercises_by_id(self):
+        training_id = self.client.post('/api/training/', self.payload(self.exercises[:3]), format='json').data['id']
+        kept, changed, removed = models.TrainingExercise.objects.filter(training_id=training_id).order_by('id')
+        payload = self.payload([])
+        payload['exercises'] = [
+            {'id': kept.id, 'exercise': {'id': kept.exercise_id}, 'repetitions': 10, 'series': 4,
+             'rest_time': '00:01:30'},
+            {'id': changed.id, 'exercise': {'id': changed.exercise_id}, 'repetitions': 15, 'series': 4,
+             'rest_time': '00:01:30'},
+            {'exercise': {'id': self.exercises[7].id}, 'repetitions': 8, 'series': 3, 'rest_time': '00:01:00'},
+        ]
+        response = self.client.put(f'/api/training/{training_id}/', payload, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        rows = {row.id: row for row in models.TrainingExercise.objects.filter(training_id=training_id)}
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[kept.id].modified_at, kept.modified_at)
+        self.assertEqual(rows[changed.id].repetitions, 15)
+        self.assertFalse(rows[removed.id].active)
+        self.assertGreater(rows[removed.id].modified_at, removed.modified_at)
+
+        payload['exercises'][0]['id'] = 0
+        self.assertEqual(self.client.put(f'/api/training/{training_id}/', payload, format='json').status_code, 400)
+
+    def test_update_runs_a_bounded_number_of_queries(self):
+        training_id = self.client.post('/api/training/', self.payload(self.exercises), format='json').data['id']
+        rows = models.TrainingExercise.objects.filter(training_id=training_id).order_by('id')
+        payload = self.payload([])
+        payload['exercises'] = [
+            {'id': row.id, 'exercise': {'id': self.exercises[(index + 1) % 8].id}, 'repetitions': 12, 'series': 4,
+             'rest_time': '00:01:30'}
+            for index, row in enumerate(rows[:6])
+        ] + [
+            {'exercise': {'id': exercise.id}, 'repetitions': 8, 'series': 3, 'rest_time': '00:01:00'}
+            for exercise in self.exercises[:4]
+        ]
+        with self.assertNumQueries(9):
+            response = self.client.put(f'/api/training/{training_id}/', payload, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(models.TrainingExercise.active_objects.filter(training_id=training_id).count(), 10)
+
+
+class CatalogCacheTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='catalogo@dailyfit.com')
+        self.client.force_authenticate(self.user)
+
+    def test_list_is_served_from_cache_until_a_write(self):
+        self.client.get('/api/food/')
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/food/')
+        self.assertEqual(response.status_code, 200)
+
+        food = models.Food.objects.get(pk=response.data['results'][0]['id'])
+        food.description = 'Alimento atualizado'
+        food.save()
+
+        response = self.client.get('/api/food/')
+        self.assertEqual(response.data['results'][0]['description'], 'Alimento atualizado')
+
+    def test_detail_is_invalidated_on_delete(self):
+        muscle_group = models.MuscleGroup.objects.create(name='Trapézio')
+        url = f'/api/muscleGroup/{muscle_group.id}/'
+        self.assertEqual(self.client.get(url).status_code, 200)
+        muscle_group.delete()
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(self.client.get('/api/muscleGroup/abc/').status_code, 404)
+
+
+class FoodSearchTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='busca@dailyfit.com')
+        self.client.force_authenticate(self.user)
+        for description in ['Pão de queijo teste', 'Requeijão cremoso teste', 'Torta de queijo teste', 'Açaí teste']:
+            models.Food.objects.create(description=description, total_kcal=100, value=100)
+
+    def search(self, term, **params):
+        return self.client.get('/api/food/search/', {'q': term, **params})
+
+    def test_search_ignores_accents_and_case(self):
+        self.assertIn('Pão de queijo teste', [food['description'] for food in self.search('PAO DE QUEIJO').data])
+        self.assertIn('Açaí teste', [food['description'] for food in self.search('acai').data])
+        self.assertIn('Pão de queijo teste', [food['description'] for food in self.search('pãó').data])
+
+    def test_search_ranks_closest_match_first(self):
+        descriptions = [food['description'] for food in self.search('queij').data if food['description'].endswith('teste')]
+        self.assertEqual(descriptions[0], 'Pão de queijo teste')
+        self.assertLess(descriptions.index('Torta de queijo teste'), descriptions.index('Requeijão cremoso teste'))
+
+    def test_empty_and_short_queries(self):
+        for term in ['', '   ']:
+            response = self.search(term)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data, [])
+        self.assertEqual(len(self.search('ã').data), 20)
+        self.assertEqual(len(self.search('ã', limit=3).data), 3)
+        self.assertEqual(self.search('ã', limit=0).data, [])
+        self.assertEqual(self.search('ã', limit='abc').status_code, 400)
+
+    def test_description_filter_ignores_accents_and_keeps_pagination(self):
+        response = self.client.get('/api/food/', {'description': 'ACAI'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Açaí teste', [food['description'] for food in response.data['results']])
+        self.assertTrue(all('Açaí' in food['description'] for food in response.data['results']))
+        self.assertIn('next', response.data)
+        response = self.client.get('/api/food/', {'description': 'requeijao cremoso'})
+        self.assertEqual([food['description'] for food in response.data['results']], ['Requeijão cremoso teste'])
+
+
+class ConditionalGetTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='sync@dailyfit.com')
+        self.client.force_authenticate(self.user)
+        self.food = models.Food.objects.create(description='Banana teste', total_kcal=90, value=100)
+        self.meal = models.Meal.objects.create(user=self.user, date=datetime.date(2024, 7, 1), meal_type=2)
+
+    def test_list_returns_not_modified_without_serializing(self):
+        response = self.client.get('/api/meal/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.has_header('Last-Modified'))
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/meal/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_meal_item_changes_invalidate_meal_list(self):
+        etag = self.client.get('/api/meal/')['ETag']
+        models.MealFood.objects.create(meal=self.meal, food=self.food, value=100)
+        response = self.client.get('/api/meal/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0]['total_calories'], 90)
+
+    def test_soft_delete_advances_last_modified(self):
+        other = models.Meal.objects.create(user=self.user, date=datetime.date(2024, 7, 2), meal_type=3)
+        past = timezone.now() - datetime.timedelta(minutes=5)
+        models.Meal.objects.update(modified_at=past)
+        response = self.client.get('/api/meal/')
+        self.assertEqual(response.status_code, 200)
+        last_modified = response['Last-Modified']
+        self.assertEqual(self.client.get('/api/meal/', HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+
+        self.assertEqual(self.client.delete(f'/api/meal/{other.id}/').status_code, 204)
+        self.assertEqual(self.client.get('/api/meal/', HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 200)
+
+    def test_training_etag_follows_nested_user(self):
+        models.Training.objects.create(user=self.user, name='Costas', date=datetime.date(2024, 7, 1))
+        response = self.client.get('/api/training/')
+        self.assertFalse(response.has_header('Last-Modified'))
+        etag = response['ETag']
+        self.assertEqual(self.client.get('/api/training/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.user.first_name = 'Ana'
+        self.user.save()
+        response = self.client.get('/api/training/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0]['user']['first_name'], 'Ana')
+
+    def test_detail_changes_after_delete(self):
+        url = f'/api/meal/{self.meal.id}/'
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.meal.delete()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 404)
+
+
+class SyncTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='delta@dailyfit.com')
+        self.client.force_authenticate(self.user)
+        self.food = models.Food.objects.create(description='Aveia', total_kcal=390, value=100)
+        self.meal = models.Meal.objects.create(user=self.user, date=datetime.date(2024, 8, 1), meal_type=1)
+        self.item = models.MealFood.objects.create(meal=self.meal, food=self.food, value=50)
+        self.training = models.Training.objects.create(user=self.user, name='Costas', date=datetime.date(2024, 8, 1))
+
+    def test_initial_sync_returns_active_rows(self):
+        with self.assertNumQueries(4):
+            response = self.client.get('/api/sync/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['id'] for row in response.data['meal']['updated']], [self.meal.id])
+        self.assertEqual(response.data['meal']['updated'][0]['total_calories'], 195)
+        self.assertEqual([row['id'] for row in response.data['training']['updated']], [self.training.id])
+
+    def test_delta_contains_only_changes_and_tombstones(self):
+        since = self.client.get('/api/sync/').data['until']
+        self.client.patch(f'/api/training/{self.training.id}/', {'name': 'Costas e bíceps'}, format='json')
+        self.assertEqual(self.client.delete(f'/api/meal/{self.meal.id}/').status_code, 204)
+
+        response = self.client.get('/api/sync/', {'since': since.isoformat()})
+        self.assertEqual([row['name'] for row in response.data['training']['updated']], ['Costas e bíceps'])
+        self.assertEqual(response.data['meal'], {'updated': [], 'deleted': [self.meal.id]})
+        self.assertEqual(response.data['meal_food'], {'updated': [], 'deleted': [self.item.id]})
+        self.assertFalse(models.DailyNutrition.objects.filter(user=self.user).exists())
+        self.assertEqual(self.client.get(f'/api/meal/{self.meal.id}/').status_code, 404)
+
+    def test_hard_deletes_produce_tombstones(self):
+        since = self.client.get('/api/sync/').data['until']
+        exercise = models.Exercise.objects.create(
+            name='Remada', muscle_group=models.MuscleGroup.objects.create(name='Costas'))
+        item = models.TrainingExercise.objects.create(training=self.training, exercise=exercise, repetitions=10,
+                                                      series=3, rest_time=datetime.timedelta(60))
+        self.food.delete()
+        exercise.delete()
+        models.Training.objects.filter(pk=self.training.pk).delete()
+
+        response = self.client.get('/api/sync/', {'since': since.isoformat()})
+        self.assertEqual(response.data['meal_food']['deleted'], [self.item.id])
+        self.assertEqual(response.data['training_exercise'], {'updated': [], 'deleted': [item.id]})
+        self.assertEqual(response.data['training'], {'updated': [], 'deleted': [self.training.id]})
+
+    def test_late_commits_are_not_skipped(self):
+        until = self.client.get('/api/sync/').data['until']
+        late = models.Training.objects.create(user=self.user, name='Pernas', date=datetime.date(2024, 8, 2))
+        models.Training.objects.filter(pk=late.pk).update(modified_at=timezone.now() - datetime.timedelta(seconds=1))
+
+        response = self.client.get('/api/sync/', {'since': until.isoformat()})
+        self.assertIn(late.id, [row['id'] for row in response.data['training']['updated']])
+        self.assertGreaterEqual(response.data['until'], until)
+
+    def test_invalid_since(self):
+        self.assertEqual(self.client.get('/api/sync/', {'since': 'ontem'}).status_code, 400)
+
+    @override_settings(SYNC_PAGE_SIZE=2)
+    def test_large_sync_is_split_in_pages(self):
+        trainings = [self.training] + [
+            models.Training.objects.create(user=self.user, name=f'Treino {i}', date=datetime.date(2024, 8, 2 + i))
+            for i in range(3)
+        ]
+        base = timezone.now() - datetime.timedelta(minutes=10)
+        for training, minutes in zip(trainings, [0, 1, 1, 2]):
+            models.Training.objects.filter(pk=training.pk).update(modified_at=base + datetime.timedelta(minutes=minutes))
+
+        with self.assertNumQueries(5):
+            first = self.client.get('/api/sync/').data
+        self.assertTrue(first['more'])
+        self.assertEqual(first['until'], base + datetime.timedelta(minutes=1))
+        self.assertEqual([row['id'] for row in first['training']['updated']], [t.id for t in trainings[:3]])
+        self.assertEqual(first['meal']['updated'], [])
+
+        second = self.client.get('/api/sync/', {'since': first['until'].isoformat()}).data
+        self.assertFalse(second['more'])
+        self.assertEqual([row['id'] for row in second['training']['updated']], [trainings[3].id])
+        self.assertEqual([row['id'] for row in second['meal']['updated']], [self.meal.id])
+        self.assertEqual([row['id'] for row in second['meal_food']['updated']], [self.item.id])
+
+
+class CachedTokenAuthenticationTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='token@dailyfit.com')
+        self.token = Token.objects.get(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.client.get('/api/food/')
+
+    def test_authenticated_request_skips_token_query(self):
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/food/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_deleted_token_is_rejected(self):
+        self.token.delete()
+        self.assertEqual(self.client.get('/api/food/').status_code, 401)
+
+    def test_deactivated_user_is_rejected(self):
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get('/api/food/').status_code, 401)
+
+
+class UserLogInTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='login@dailyfit.com', password='s3nh@-forte')
+
+    def test_login_reads_user_and_token(self):
+        with self.assertNumQueries(2):
+            response = self.client.post('/api-user-login/', {'username': 'login@dailyfit.com', 'password': 's3nh@-forte'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['token'], Token.objects.get(user=self.user).key)
+        self.assertGreater(metrics.snapshot()['login.authenticate_seconds']['count'], 0)
+
+    def test_failed_login_sends_user_login_failed(self):
+        failures = []
+        handler = lambda sender, credentials, **kwargs: failures.append(credentials['username'])
+        user_login_failed.connect(handler)
+        self.addCleanup(user_login_failed.disconnect, handler)
+        response = self.client.post('/api-user-login/', {'username': 'login@dailyfit.com', 'password': 'errada'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(failures, ['login@dailyfit.com'])
+
+    def test_invalid_credentials(self):
+        for username, password in [('login@dailyfit.com', 'errada'), ('ninguem@dailyfit.com', 's3nh@-forte')]:
+            response = self.client.post('/api-user-login/', {'username': username, 'password': password})
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('non_field_errors', response.data)
+
+    def test_inactive_user_cannot_log_in(self):
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.post('/api-user-login/', {'username': 'login@dailyfit.com', 'password': 's3nh@-forte'})
+        self.assertEqual(response.status_code, 400)
+
+
+class AsyncLogInTest(APITransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='login@dailyfit.com', password='s3nh@-forte')
+
+    async def test_login_matches_sync_login(self):
+        client = AsyncClient()
+        response = await client.post('/api/async/login/', {'username': 'login@dailyfit.com', 'password': 's3nh@-forte'},
+                                     content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        token = await Token.objects.aget(user=self.user)
+        self.assertEqual(response.json(), {'token': token.key, 'id': self.user.pk, 'username': 'login@dailyfit.com'})
+
+        response = await client.post('/api/async/login/', {'username': 'login@dailyfit.com', 'password': 'errada'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('non_field_errors', response.json())
+        response = await client.post('/api/async/login/', {'username': 'login@dailyfit.com'},
+                                     content_type='application/json')
+        self.assertEqual(response.json(), {'password': ['This field is required.']})
+
+    async def test_inactive_user_cannot_log_in(self):
+        self.user.is_active = False
+        await self.user.asave()
+        response = await AsyncClient().post('/api/async/login/',
+                                            {'username': 'login@dailyfit.com', 'password': 's3nh@-forte'})
+        self.assertEqual(response.status_code, 400)
+
+    async def test_concurrent_logins_do_not_wait_for_each_other(self):
+        hash_started = asyncio.Event()
+        release = threading.Event()
+        check_password = hashers.check_password
+
+        def slow_check(password, encoded, setter=None):
+            if password == 'lenta':
+                asyncio.run_coroutine_threadsafe(set_event(hash_started), loop)
+                release.wait(5)
+            return check_password(password, encoded, setter)
+
+        async def set_event(event):
+            event.set()
+
+        loop = asyncio.get_running_loop()
+        client = AsyncClient()
+        with mock.patch('django.contrib.auth.base_user.check_password', slow_check):
+            slow = asyncio.create_task(client.post('/api/async/login/',
+                                                   {'username': 'login@dailyfit.com', 'password': 'lenta'}))
+            await asyncio.wait_for(hash_started.wait(), 5)
+            response = await client.post('/api/async/login/',
+                                         {'username': 'login@dailyfit.com', 'password': 's3nh@-forte'})
+            self.assertFalse(slow.done())
+            release.set()
+            self.assertEqual((await slow).status_code, 400)
+        self.assertEqual(response.status_code, 200)
+
+
+class AsyncViewsTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='async@dailyfit.com')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.get(user=self.user).key}')
+        food = models.Food.objects.create(description='Arroz', total_kcal=130, value=100)
+        for day in range(1, 6):
+            meal = models.Meal.objects.create(user=self.user, date=datetime.date(2024, 9, day), meal_type=1)
+            models.MealFood.objects.create(meal=meal, food=food, value=200)
+            models.Training.objects.create(user=self.user, name=f'Treino {day}', date=datetime.date(2024, 9, day))
+
+    def test_meal_list_matches_sync_endpoint(self):
+        sync_data = self.client.get('/api/meal/', {'page_size': 2}).data['results']
+        response = self.client.get('/api/async/meal/', {'page_size': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'], sync_data)
+
+        next_page = self.client.get(response.json()['next'])
+        self.assertEqual([meal['date'] for meal in next_page.json()['results']], ['2024-09-03', '2024-09-02'])
+
+    def test_pagination_matches_sync_cursors(self):
+        for sync_url, async_url in [('/api/meal/', '/api/async/meal/'), ('/api/training/', '/api/async/training/')]:
+            sync_page = self.client.get(sync_url, {'page_size': 2}).json()
+            async_page = self.client.get(async_url, {'page_size': 2}).json()
+            while sync_page['next']:
+                self.assertEqual(async_page['results'], sync_page['results'])
+                for link in ('next', 'previous'):
+                    self.assertEqual(sync_page[link] and sync_page[link].replace(sync_url, async_url),
+                                     async_page[link])
+                sync_page = self.client.get(sync_page['next']).json()
+                async_page = self.client.get(async_page['next']).json()
+            self.assertEqual(async_page, {**sync_page, 'previous': sync_page['previous'].replace(sync_url, async_url)})
+            self.assertEqual(self.client.get(async_url, {'cursor': 'invalido'}).status_code, 404)
+
+    def test_training_list_and_summary(self):
+        response = self.client.get('/api/async/training/', {'date_after': '2024-09-04'})
+        self.assertEqual([training['name'] for training in response.json()['results']], ['Treino 5', 'Treino 4'])
+
+        response = self.client.get('/api/async/meal/daily-summary/', {'from': '2024-09-01', 'to': '2024-09-02'})
+        self.assertEqual(response.json()[0]['total_calories'], 260)
+        self.assertEqual(self.client.get('/api/async/meal/daily-summary/').status_code, 400)
+
+    def test_profile_me_requires_token(self):
+        self.assertEqual(self.client.get('/api/async/userprofile/me/').json()['login']['username'], 'async@dailyfit.com')
+        self.client.credentials()
+        self.assertEqual(self.client.get('/api/async/userprofile/me/').status_code, 401)
+
+
+class InstrumentationTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='metricas@dailyfit.com')
+        self.client.force_authenticate(self.user)
+        models.Meal.objects.create(user=self.user, date=datetime.date(2024, 10, 1), meal_type=1)
+
+    def test_server_timing_header_and_prometheus_histograms(self):
+        response = self.client.get('/api/meal/')
+        self.assertRegex(response['Server-Timing'], r'^db;desc="2 queries";dur=[\d.]+, serialize;dur=[\d.]+, ')
+
+        body = self.client.get('/metrics/').content.decode()
+        self.assertIn('dailyfit_http_queries_bucket{view="MealViewSet.list",le="2"}', body)
+        self.assertIn('dailyfit_http_response_bytes_count{view="MealViewSet.list"}', body)
+
+    @override_settings(METRICS_QUERY_ALERT_THRESHOLDS={'MealViewSet.list': 1})
+    def test_query_count_alert(self):
+        with self.assertLogs('core.metrics', 'WARNING') as logs:
+            self.client.get('/api/meal/')
+        self.assertIn('GET /api/meal/ executou 2 consultas (limite 1)', logs.output[0])
+
+    @override_settings(METRICS_TOKEN='segredo')
+    def test_metrics_token(self):
+        self.assertEqual(self.client.get('/metrics/').status_code, 401)
+        self.assertEqual(self.client.get('/metrics/', HTTP_AUTHORIZATION='Bearer segredo').status_code, 200)
+
+    @override_settings(METRICS_TOKEN='', METRICS_REQUIRE_TOKEN=True)
+    def test_metrics_disabled_without_token_when_required(self):
+        self.assertEqual(self.client.get('/metrics/').status_code, 404)
+
+
+class LoadCopyTest(APITestCase):
+    def test_generated_rows_are_copied_with_rollups_and_indexes(self):
+        call_command('load_copy', users=2, days=3, drop_indexes=True, stdout=io.StringIO())
+
+        meals = models.Meal.objects.filter(user__username__startswith='synthetic_')
+        self.assertGreaterEqual(meals.count(), 2 * 3 * 4)
+        self.assertTrue(models.MealFood.objects.filter(meal__in=meals).exists())
+        meal = meals.first()
+        self.assertEqual(meal.total_kcal, models.Meal.objects.filter(pk=meal.pk).values_list(
+            models.meal_total_calories(), flat=True).get())
+        self.assertTrue(models.DailyNutrition.objects.filter(user=meal.user, date=meal.date).exists())
+
+        with connection.cursor() as cursor:
+            indexes = connection.introspection.get_constraints(cursor, 'meal')
+        self.assertIn('meal_active_user_date_idx', indexes)
+
+
+class FoodImportTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='nutri@dailyfit.com', is_staff=True)
+        self.client.force_authenticate(self.user)
+        self.rice = models.Food.objects.create(description='Arroz teste', total_kcal=130, value=100)
+        self.meal = models.Meal.objects.create(user=self.user, date=datetime.date(2024, 10, 1), meal_type=1)
+        models.MealFood.objects.create(meal=self.meal, food=self.rice, value=200)
+
+    def upload(self, dry_run):
+        content = ('Descrição dos alimentos;Energia (kcal)\n'
+                   'Arroz teste;150,5\n'
+                   'Feijão teste;Tr\n'
+                   'Linha quebrada;NA\n').encode('latin-1')
+        file = io.BytesIO(content)
+        file.name = 'taco.csv'
+        return self.client.post(f'/api/food/import/?encoding=latin-1&dry_run={dry_run}', {'file': file},
+                                format='multipart')
+
+    def test_dry_run_reports_changes_without_writing(self):
+        response = self.upload('true')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([response.data[key] for key in ('created', 'updated', 'unchanged', 'invalid')], [1, 1, 0, 1])
+        self.assertEqual([change['action'] for change in response.data['changes']], ['invalid', 'updated', 'created'])
+        self.assertFalse(models.Food.objects.filter(description='Feijão teste').exists())
+
+    def test_import_upserts_by_description_and_refreshes_meals(self):
+        response = self.upload('false')
+        self.assertEqual(response.data['updated'], 1)
+        self.assertEqual(models.Food.objects.get(description='Feijão teste').total_kcal, 0)
+        self.meal.refresh_from_db()
+        self.assertAlmostEqual(self.meal.total_kcal, 301)
+        self.assertEqual(self.upload('false').data['unchanged'], 2)
+
+    def test_streams_rows_in_chunks(self):
+        consumed = []
+
+        def foods():
+            for index in range(25):
+                consumed.append(index)
+                yield {'description': f'Alimento lote {index}', 'total_kcal': 100, 'unit': 1, 'value': 100}
+
+        bulk_create = models.Food.objects.bulk_create
+        sizes = []
+
+        def counting_bulk_create(objs, *args, **kwargs):
+            sizes.append((len(objs), len(consumed)))
+            return bulk_create(objs, *args, **kwargs)
+
+        with mock.patch.object(models.Food.objects, 'bulk_create', counting_bulk_create):
+            summary = imports.import_foods(foods(), chunk_size=10)
+        self.assertEqual(sizes, [(10, 10), (10, 20), (5, 25)])
+        self.assertEqual(summary['created'], 25)
+        self.assertEqual(models.Food.objects.filter(description__startswith='Alimento lote').count(), 25)
+
+    def test_repeated_descriptions_in_a_chunk_count_once(self):
+        lines = ['description,total_kcal', 'Aveia teste,300', 'Arroz teste,130', 'Aveia teste,390']
+        for dry_run in (True, False):
+            summary = imports.import_foods(imports.read_foods(iter(lines)), chunk_size=3, dry_run=dry_run)
+            self.assertEqual([summary[key] for key in ('created', 'updated', 'unchanged')], [1, 0, 1])
+        self.assertEqual(models.Food.objects.get(description='Aveia teste').total_kcal, 390)
+
+    def test_failure_keeps_committed_chunks_unless_atomic(self):
+        lines = ['description,total_kcal', 'Aveia teste,300', 'Arroz teste,150']
+        for atomic in (True, False):
+            with mock.patch('core.rollups.refresh_meals', side_effect=RuntimeError):
+                with self.assertRaises(RuntimeError):
+                    imports.import_foods(imports.read_foods(iter(lines)), chunk_size=1, atomic=atomic)
+            self.assertEqual(models.Food.objects.filter(description='Aveia teste').exists(), not atomic)
+            self.assertEqual(models.Food.objects.get(pk=self.rice.pk).total_kcal, 130)
+
+    def test_requires_admin(self):
+        self.user.is_staff = False
+        self.user.save()
+        self.assertEqual(self.upload('true').status_code, 403)
+
+
+class ExportTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='export@dailyfit.com')
+        self.client.force_authenticate(self.user)
+        self.token = Token.objects.get(user=self.user).key
+        food = models.Food.objects.create(description='Aveia export', total_kcal=390, value=100)
+        meal = models.Meal.objects.create(user=self.user, date=datetime.date(2024, 5, 2), meal_type=1)
+        models.MealFood.objects.create(meal=meal, food=food, value=50)
+        models.MealFood.objects.create(meal=meal, food=food, value=10, active=False)
+        models.Meal.objects.create(user=self.user, date=datetime.date(2024, 5, 1), meal_type=5)
+
+    def content(self, response):
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_meals_csv(self):
+        response = self.client.get('/api/export/meals/')
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        lines = self.content(response).splitlines()
+        self.assertEqual(lines[0], 'meal_id,date,meal_type,meal_type_name,item_id,food,value,unit,kcal')
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[1].endswith(',2024-05-01,5,Jantar,,,,,'))
+        self.assertTrue(lines[2].endswith(',Aveia export,50.0,g,195.0'))
+
+    async def test_asgi_streams_with_async_iterator(self):
+        response = await AsyncClient().get('/api/export/meals/', {'output': 'ndjson'},
+                                           headers={'Authorization': f'Token {self.token}'})
+        self.assertTrue(response.is_async)
+        content = ''.join([chunk.decode() async for chunk in response.streaming_content])
+        self.assertEqual([json.loads(line)['kcal'] for line in content.splitlines()], [None, 195.0])
+
+    def test_wsgi_streams_with_sync_iterator(self):
+        response = self.client.get('/api/export/meals/', {'output': 'ndjson'})
+        self.assertFalse(response.is_async)
+        self.assertEqual(len(self.content(response).splitlines()), 2)
+
+    def test_ndjson_with_period(self):
+        response = self.client.get('/api/export/meals/?output=ndjson&from=2024-05-02')
+        rows = [json.loads(line) for line in self.content(response).splitlines()]
+        self.assertEqual([(row['date'], row['kcal']) for row in rows], [('2024-05-02', 195.0)])
+        self.assertEqual(self.client.get('/api/export/meals/?output=xml').status_code, 400)
+
+    def test_trainings_export_rest_time_in_seconds(self):
+        group = models.MuscleGroup.objects.create(name='Pernas')
+        exercise = models.Exercise.objects.create(name='Agachamento', muscle_group=group)
+        training = models.Training.objects.create(user=self.user, name='Treino A', date=datetime.date(2024, 5, 2))
+        for rest_time in [datetime.timedelta(0), datetime.timedelta(seconds=90)]:
+            models.TrainingExercise.objects.create(training=training, exercise=exercise, repetitions=10, series=3,
+                                                   rest_time=rest_time)
+        models.Training.objects.create(user=self.user, name='Treino vazio', date=datetime.date(2024, 5, 3))
+        response = self.client.get('/api/export/trainings/', {'output': 'ndjson'})
+        rows = [json.loads(line) for line in self.content(response).splitlines()]
+        self.assertEqual([row['rest_seconds'] for row in rows], [0, 90, None])
@@ -1,6 +1,8 @@
+from django.urls import path
+from django.views.decorators.csrf import csrf_exempt
 from rest_framework import routers
 
-from core import viewsets
+from core import async_views, viewsets
 
 router = routers.DefaultRouter()
 
@@ -11,7 +13,16 @@ router.register('training', viewsets.TrainingViewSet)
 router.register('training-exercise', viewsets.TrainingExerciseViewSet)
 router.register('meal', viewsets.MealViewSet)
 router.register('meal-food', viewsets.MealFoodViewSet)
+router.register('daily-nutrition', viewsets.DailyNutritionViewSet)
+router.register('sync', viewsets.SyncViewSet, basename='sync')
+router.register('export', viewsets.ExportViewSet, basename='export')
 router.register('food', viewsets.FoodViewSet)
 
 
-urlpatterns = router.urls
+urlpatterns = [
+    path('async/login/', csrf_exempt(async_views.LogInView.as_view())),
+    path('async/meal/', async_views.MealListView.as_view()),
+    path('async/meal/daily-summary/', async_views.DailySummaryView.as_view()),
+    path('async/training/', async_views.TrainingListView.as_view()),
+    path('async/userprofile/me/', async_views.ProfileMeView.as_view()),
+] + router.urls
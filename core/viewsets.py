@@ -1,22 +1,175 @@
+import datetime
+import hashlib
+import io
+from functools import partial
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from django.db.models import Count, Max, Prefetch, Subquery
+from django.db.models.functions import Now
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.http import http_date
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.parsers import MultiPartParser
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from django.contrib.auth.models import User
-from rest_framework.authtoken.models import Token
 from rest_framework import generics
+from rest_framework.authtoken.models import Token
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from core.serializers import RegisterSerializer
-from core import models, serializers, filters
+from core import cache, exports, imports, metrics, models, serializers, filters, pagination
 from core.models import UserProfile
 
+
+class BulkModelMixin:
+    @action(detail=False, methods=['post', 'put'])
+    def bulk(self, request):
+        if not isinstance(request.data, list):
+            return Response({"detail": "Envie uma lista de itens."}, status=status.HTTP_400_BAD_REQUEST)
+
+        instance = None
+        if request.method == 'PUT':
+            ids = [item.get('id') for item in request.data if isinstance(item, dict)]
+            instance = list(self.get_queryset().filter(pk__in=[pk for pk in ids if isinstance(pk, int)]))
+
+        serializer = self.get_serializer(instance, data=request.data, many=True, max_length=settings.API_MAX_PAGE_SIZE)
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            instances = serializer.save()
+
+        queryset = self.get_queryset().filter(pk__in=[obj.pk for obj in instances]).order_by('id')
+        response_status = status.HTTP_201_CREATED if request.method == 'POST' else status.HTTP_200_OK
+        return Response(self.get_serializer(queryset, many=True).data, status=response_status)
+
+# BulkModelMixin: adiciona o endpoint em lote /bulk/ ao viewset.
+# POST cria todos os itens da lista e PUT atualiza os itens informados (cada um com seu id),
+# em uma única transação. Os IDs relacionados são resolvidos com um in_bulk por campo e a gravação é
+# feita com bulk_create / bulk_update (ver BulkListSerializer). A resposta relê os itens pelo
+# get_queryset, que já traz os relacionamentos sem consultas por linha.
+
+
+class ConditionalGetMixin:
+    etag_fields = ['modified_at']
+    etag_owner = None
+    etag_user_fields = []
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        return self.conditional_response(request, queryset, partial(super().list, request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        build = partial(super().retrieve, request, *args, **kwargs)
+        try:
+            queryset = self.filter_queryset(self.get_queryset()).filter(**{self.lookup_field: kwargs[lookup_url_kwarg]})
+        except (TypeError, ValueError, DjangoValidationError):
+            return build()
+        return self.conditional_response(request, queryset, build)
+
+    def get_validators(self, request, queryset):
+        aggregates = {f'modified_{index}': Max(field) for index, field in enumerate(self.etag_fields)}
+        if self.etag_owner:
+            model, owner = self.etag_owner
+            aggregates['modified_owner'] = Max(Subquery(
+                model.objects.filter(**{owner: request.user}).order_by().values(owner)
+                .annotate(last=Max('modified_at')).values('last')
+            ))
+        state = queryset.aggregate(count=Count('pk'), **aggregates)
+        count = state.pop('count')
+        modified = [value for value in state.values() if value is not None]
+        last_modified = max(modified) if modified else None
+        user_state = [getattr(request.user, field) for field in self.etag_user_fields]
+        digest = hashlib.md5(
+            f'{request.user.pk}:{request.get_full_path()}:{count}:{last_modified}:{user_state}'.encode(),
+            usedforsecurity=False,
+        ).hexdigest()
+        if self.etag_user_fields:
+            last_modified = None
+        return f'W/"{digest}"', last_modified and int(last_modified.timestamp())
+
+    def conditional_response(self, request, queryset, build):
+        etag, last_modified = self.get_validators(request, queryset)
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = self.build_response(request, build)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+        response['ETag'] = etag
+        if last_modified:
+            response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def build_response(self, request, build):
+        return build()
+
+# ConditionalGetMixin: GET condicional (ETag / Last-Modified) para list e retrieve.
+# Os validadores vêm de uma única consulta agregada (quantidade de linhas e maior modified_at
+# do queryset e dos relacionamentos em etag_fields); se o cliente já tem a versão atual
+# (If-None-Match / If-Modified-Since), responde 304 sem serializar nada.
+# Um id inválido na URL segue para a view padrão, que responde 404.
+# etag_owner: (modelo, campo do usuário); soma aos validadores o maior modified_at de todos os registros do
+# usuário nesse modelo, inclusive os inativos, para que um DELETE (que só inativa) também mude o Last-Modified.
+# etag_user_fields: campos do usuário autenticado serializados na resposta (ex.: o user aninhado do treino).
+# Entram no ETag; como User não tem data de alteração, essas views não enviam Last-Modified.
+
+
+class CachedCatalogMixin(ConditionalGetMixin):
+    def get_validators(self, request, queryset):
+        key = f'validators:{request.build_absolute_uri()}'
+        validators = cache.get_payload(queryset.model, key)
+        if validators is None:
+            validators = super().get_validators(request, queryset)
+            cache.set_payload(queryset.model, key, validators)
+        return validators
+
+    def build_response(self, request, build):
+        return self.cached_response(request, build)
+
+    def cached_response(self, request, build):
+        model = self.get_queryset().model
+        key = request.build_absolute_uri()
+        payload = cache.get_payload(model, key)
+        if payload is not None:
+            return Response(payload, status=status.HTTP_200_OK)
+
+        response = build()
+        if response.status_code == status.HTTP_200_OK:
+            cache.set_payload(model, key, response.data)
+        return response
+
+# CachedCatalogMixin: cache de leitura para os catálogos (Food, Exercise, MuscleGroup).
+# As respostas de list/retrieve e os validadores do GET condicional ficam no cache sob a versão atual
+# do modelo e a URL completa (com filtros e cursor); o banco só é consultado na primeira leitura após cada escrita.
+
+
+class SoftDeleteMixin:
+    soft_delete_related = []
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            for related in self.soft_delete_related:
+                getattr(instance, related).filter(active=True).update(active=False, modified_at=Now())
+            instance.active = False
+            instance.save()
+
+# SoftDeleteMixin: DELETE marca o registro (e os filhos listados em soft_delete_related) como inativo em vez
+# de apagá-lo. Como modified_at é atualizado, a remoção aparece como tombstone no /api/sync/.
+
+
 # UserProfileViewSet: classe que gerencia a lógica de visualização (views) para o modelo UserProfile,
 # implementando métodos personalizados para manipular os perfis de usuário.
 
 class UserProfileViewSet(viewsets.ViewSet):
-    queryset = models.UserProfile.objects.all()
+    queryset = models.UserProfile.active_objects.all()
 
     @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated])
     def update_profile(self, request):
@@ -68,111 +221,334 @@ class UserProfileViewSet(viewsets.ViewSet):
 # Este método retorna os dados do perfil do usuário autenticado.
 
 
-class MuscleGroupViewSet(viewsets.ModelViewSet):
-    queryset = models.MuscleGroup.objects.all()
+class MuscleGroupViewSet(CachedCatalogMixin, viewsets.ModelViewSet):
+    queryset = models.MuscleGroup.active_objects.all()
     serializer_class = serializers.MuscleGroupSerializer
     filter_backends = [DjangoFilterBackend]
 
 
-class ExerciseViewSet(viewsets.ModelViewSet):
-    queryset = models.Exercise.objects.all()
+class ExerciseViewSet(CachedCatalogMixin, viewsets.ModelViewSet):
+    queryset = models.Exercise.active_objects.all()
     serializer_class = serializers.ExerciseSerializer
     filter_backends = [DjangoFilterBackend]
     permission_classes = [IsAuthenticated]
 
 
-class TrainingViewSet(viewsets.ModelViewSet):
-    queryset = models.Training.objects.all()
+class TrainingViewSet(ConditionalGetMixin, SoftDeleteMixin, viewsets.ModelViewSet):
+    queryset = models.Training.active_objects.all()
     serializer_class = serializers.TrainingSerializer
     filterset_class = filters.TrainingFilter
-    filter_backends = [DjangoFilterBackend]
+    filter_backends = [DjangoFilterBackend, filters.StableOrderingFilter]
+    ordering_fields = ['date', 'name']
+    ordering = ['-date', '-id']
+    pagination_class = pagination.DateCursorPagination
     permission_classes = [IsAuthenticated]
+    soft_delete_related = ['trainingexercise_set']
+    etag_owner = (models.Training, 'user')
+    etag_user_fields = ['username', 'first_name', 'last_name']
 
     def get_queryset(self):
         user = self.request.user
-        return models.Training.objects.filter(user=user)
+        return models.Training.active_objects.filter(user=user).select_related('user')
 
     def perform_create(self, serializer):
         return serializer.save(user=self.request.user)
 
 # get_queryset: Este método personaliza o comportamento padrão do conjunto de dados (queryset).
 # Em vez de retornar todos os objetos, ele filtra os treinamentos apenas para o usuário autenticado (request.user).
+# O usuário (serializado aninhado em cada treino) vem no mesmo SELECT.
 # Usado na listagem de treinos
 
+# ordering: ?ordering=date, -date, name ou -name; o padrão é do treino mais recente para o mais antigo.
+
 # perform_create: ste método é chamado automaticamente ao criar um novo treinamento (POST /trainings/).
 # Ele associa o usuário autenticado ao treinamento criado.
 
 
-class TrainingExerciseViewSet(viewsets.ModelViewSet):
-    queryset = models.TrainingExercise.objects.all()
+class TrainingExerciseViewSet(BulkModelMixin, ConditionalGetMixin, SoftDeleteMixin, viewsets.ModelViewSet):
+    queryset = models.TrainingExercise.active_objects.all()
     serializer_class = serializers.TrainingExerciseSerializer
+    etag_fields = ['modified_at', 'exercise__modified_at', 'training__modified_at']
+    etag_owner = (models.TrainingExercise, 'training__user')
+    etag_user_fields = ['username', 'first_name', 'last_name']
     filter_backends = [DjangoFilterBackend]
+    pagination_class = pagination.IdCursorPagination
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
+        queryset = models.TrainingExercise.active_objects.select_related(
+            'exercise__muscle_group', 'training__user'
+        ).filter(training__user=self.request.user)
         training_id = self.request.query_params.get('training')
         if training_id:
-            return models.TrainingExercise.objects.filter(training__id=training_id)
-        return models.TrainingExercise.objects.select_related('training').filter(training__user=self.request.user).all()
+            return queryset.filter(training__id=training_id)
+        return queryset
 
 # Este método sobrescreve o comportamento padrão para ajustar o conjunto de dados com base no contexto da requisição.
+# Sempre restrito aos treinos do usuário autenticado (inclusive no PUT em lote, que carrega os itens por aqui).
 # Se training for especificado: Lista exercícios apenas daquele treino.
-# Se não for especificado: Lista exercícios dos treinos pertencentes ao usuário autenticado.
+# Nos dois casos exercício, grupo muscular, treino e usuário do treino vêm no mesmo SELECT (select_related),
+# evitando consultas extras por linha na serialização aninhada.
+
 
+def summary_period(params):
+    try:
+        date_from = parse_date(params.get('from', ''))
+        date_to = parse_date(params.get('to', ''))
+    except ValueError:
+        date_from = date_to = None
+    if date_from is None or date_to is None:
+        return None, "Informe as datas from e to no formato AAAA-MM-DD."
+    if date_from > date_to or (date_to - date_from).days > 366:
+        return None, "Período inválido (máximo de 366 dias)."
+    return (date_from, date_to), None
 
-class MealViewSet(viewsets.ModelViewSet):
-    queryset = models.Meal.objects.all()
+
+def group_by_day(rows):
+    days = {}
+    for row in rows:
+        day = days.setdefault(row['date'], {'date': row['date'], 'total_calories': 0, 'meals': []})
+        day['total_calories'] += row['total_calories']
+        day['meals'].append({'meal_type': row['meal_type'], 'total_calories': row['total_calories']})
+    return list(days.values())
+
+# summary_period / group_by_day: validação do período e montagem da resposta do resumo diário,
+# compartilhadas entre MealViewSet.daily_summary e a versão assíncrona (core/async_views.py).
+
+
+class MealViewSet(ConditionalGetMixin, SoftDeleteMixin, viewsets.ModelViewSet):
+    queryset = models.Meal.active_objects.all()
     serializer_class = serializers.MealSerializer
     filter_backends = [DjangoFilterBackend]
+    pagination_class = pagination.DateCursorPagination
     permission_classes = [IsAuthenticated]
+    soft_delete_related = ['mealfood_set']
+    etag_owner = (models.Meal, 'user')
 
     def get_queryset(self):
         user = self.request.user
-        return models.Meal.objects.filter(user=user)
+        return models.Meal.active_objects.filter(user=user).with_total_calories()
 
     def perform_create(self, serializer):
         return serializer.save(user=self.request.user)
 
+    @action(detail=False, methods=['get'], url_path='daily-summary')
+    def daily_summary(self, request):
+        period, error = summary_period(request.query_params)
+        if error:
+            return Response({"detail": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        rows = models.Meal.active_objects.filter(user=request.user, date__range=period).calories_by_day()
+        return Response(group_by_day(rows), status=status.HTTP_200_OK)
+
 # get_queryset: Filtra os objetos Meal para incluir apenas as refeições associadas ao usuário autenticado (self.request.user).
+# O total de calorias de cada refeição já vem anotado pelo banco (with_total_calories).
 # perform_create: garante que a refeição criada seja automaticamente associada ao usuário autenticado.
+# daily_summary: GET /api/meal/daily-summary/?from=AAAA-MM-DD&to=AAAA-MM-DD
+# Retorna, para cada dia com refeições, o total de calorias do dia e por tipo de refeição,
+# calculados pelo banco numa única consulta agrupada.
+
+
+class DailyNutritionViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
+    queryset = models.DailyNutrition.active_objects.all()
+    serializer_class = serializers.DailyNutritionSerializer
+    filterset_class = filters.DailyNutritionFilter
+    filter_backends = [DjangoFilterBackend]
+    pagination_class = pagination.DateCursorPagination
+    permission_classes = [IsAuthenticated]
+    etag_owner = (models.Meal, 'user')
+
+    def get_queryset(self):
+        user = self.request.user
+        return models.DailyNutrition.active_objects.filter(user=user)
+
+# Expõe o total diário de calorias já materializado (tabela daily_nutrition) do usuário autenticado.
+# A consulta de um dia (?date=) é a leitura de uma única linha pelo índice único (usuário, dia).
+# Os dias sem refeições são apagados pelo rollup; como toda mudança num dia parte de uma refeição
+# (que é inativada, não apagada), o Last-Modified acompanha as refeições do usuário.
 
 
-class FoodViewSet(viewsets.ModelViewSet):
-    queryset = models.Food.objects.all()
+class FoodViewSet(CachedCatalogMixin, viewsets.ModelViewSet):
+    queryset = models.Food.active_objects.all()
     serializer_class = serializers.FoodSerializer
+    filterset_class = filters.FoodFilter
     filter_backends = [DjangoFilterBackend]
+    pagination_class = pagination.IdCursorPagination
     permission_classes = [IsAuthenticated]
 
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        return self.cached_response(request, lambda: self.search_response(request))
 
-class MealFoodViewSet(viewsets.ModelViewSet):
-    queryset = models.MealFood.objects.all()
+    def search_response(self, request):
+        term = request.query_params.get('q', '').strip()
+        try:
+            limit = min(int(request.query_params.get('limit', 20)), settings.API_MAX_PAGE_SIZE)
+        except ValueError:
+            return Response({"limit": "Informe um número inteiro."}, status=status.HTTP_400_BAD_REQUEST)
+        if not term or limit <= 0:
+            return Response([], status=status.HTTP_200_OK)
+
+        foods = self.get_queryset().search(term).order_by('-rank', 'description')[:limit]
+        serializer = self.get_serializer(foods, many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser],
+            permission_classes=[IsAdminUser])
+    def import_csv(self, request):
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({"file": "Envie o arquivo CSV no campo file."}, status=status.HTTP_400_BAD_REQUEST)
+        dry_run = request.query_params.get('dry_run', '').lower() in ('1', 'true')
+        atomic = request.query_params.get('atomic', '').lower() in ('1', 'true')
+        encoding = request.query_params.get('encoding', 'utf-8-sig')
+
+        changes = []
+
+        def report(change):
+            if len(changes) < settings.API_MAX_PAGE_SIZE:
+                changes.append(change)
+
+        try:
+            lines = io.TextIOWrapper(upload.file, encoding=encoding, newline='')
+            summary = imports.import_foods(imports.read_foods(lines), dry_run=dry_run, report=report, atomic=atomic)
+        except (LookupError, ValueError) as error:
+            return Response({"file": str(error)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({**summary, 'dry_run': dry_run, 'changes': changes}, status=status.HTTP_200_OK)
+
+# search: busca para autocompletar (?q=termo&limit=20). Ignora acentos e maiúsculas, usa o índice trigram
+# da descrição e devolve os alimentos mais parecidos com o termo primeiro.
+# Na listagem padrão, ?description= aplica o mesmo filtro mantendo a paginação por id.
+# import: POST multipart (campo file) com um CSV de alimentos, no formato da API ou no estilo TACO, restrito a
+# administradores. Cria ou atualiza pela descrição em lotes (core/imports.py); o arquivo é lido linha a linha do
+# upload, que o Django guarda em disco quando é grande. ?dry_run=true só calcula o resumo e a lista de alterações
+# (limitada a API_MAX_PAGE_SIZE itens); ?encoding=latin-1 para arquivos exportados de planilhas antigas;
+# ?atomic=true grava tudo numa transação (sem ele, cada lote é confirmado separadamente).
+
+
+class MealFoodViewSet(BulkModelMixin, ConditionalGetMixin, SoftDeleteMixin, viewsets.ModelViewSet):
+    queryset = models.MealFood.active_objects.all()
     serializer_class = serializers.MealFoodSerializer
+    etag_fields = ['modified_at', 'meal__modified_at', 'food__modified_at']
+    etag_owner = (models.MealFood, 'meal__user')
     filter_backends = [DjangoFilterBackend]
+    pagination_class = pagination.IdCursorPagination
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
+        queryset = models.MealFood.active_objects.select_related('food').prefetch_related(
+            Prefetch('meal', queryset=models.Meal.objects.with_total_calories())
+        ).filter(meal__user=self.request.user)
         meal_id = self.request.query_params.get('diet')
         if meal_id:
-            return models.MealFood.objects.filter(meal__id=meal_id)
-        return models.MealFood.objects.select_related('meal').filter(meal__user=self.request.user).all()
+            return queryset.filter(meal__id=meal_id)
+        return queryset
 
 # Personaliza o conjunto de dados retornado pela API com base nos parâmetros da URL e no contexto do usuário autenticado.
+# Sempre restrito às refeições do usuário; ?diet= filtra uma refeição dele.
+# O alimento vem no mesmo SELECT e as refeições são carregadas numa única consulta extra, já com o total
+# de calorias anotado, então a listagem não recalcula o total da refeição a cada item.
 
 
 
+class SyncViewSet(viewsets.ViewSet):
+    permission_classes = [IsAuthenticated]
+
+    def list(self, request):
+        since = request.query_params.get('since')
+        if since:
+            try:
+                since = parse_datetime(since)
+            except ValueError:
+                since = None
+            if since is None:
+                return Response({"since": "Informe uma data/hora no formato ISO 8601."},
+                                status=status.HTTP_400_BAD_REQUEST)
+            if timezone.is_naive(since):
+                since = timezone.make_aware(since, datetime.timezone.utc)
+        now = timezone.now()
+
+        user = request.user
+        sources = {
+            'training': (models.Training.objects.filter(user=user), serializers.SyncTrainingSerializer),
+            'training_exercise': (models.TrainingExercise.objects.filter(training__user=user),
+                                  serializers.SyncTrainingExerciseSerializer),
+            'meal': (models.Meal.objects.filter(user=user).with_total_calories(), serializers.MealSerializer),
+            'meal_food': (models.MealFood.objects.filter(meal__user=user), serializers.SyncMealFoodSerializer),
+        }
+        tombstones = {name: set() for name in sources}
+        if since:
+            for table, object_id in models.SyncTombstone.objects.filter(
+                user=user, deleted_at__gt=since, deleted_at__lte=now, table__in=sources,
+            ).values_list('table', 'object_id'):
+                tombstones[table].add(object_id)
+
+        limit = settings.SYNC_PAGE_SIZE
+        pages = {}
+        for name, (queryset, serializer_class) in sources.items():
+            queryset = queryset.filter(modified_at__lte=now).order_by('modified_at', 'id')
+            if since:
+                queryset = queryset.filter(modified_at__gt=since)
+            else:
+                queryset = queryset.filter(active=True)
+            pages[name] = (queryset, serializer_class, list(queryset[:limit + 1]))
+        cutoff = min((rows[limit - 1].modified_at for *_, rows in pages.values() if len(rows) > limit),
+                     default=None)
+
+        until = now - datetime.timedelta(seconds=settings.SYNC_LAG_SECONDS)
+        if cutoff is not None and (cutoff < until or (since and since >= until)):
+            until = cutoff
+        elif since and since > until:
+            until = since
+
+        data = {'since': since, 'until': until, 'more': cutoff is not None}
+        for name, (queryset, serializer_class, rows) in pages.items():
+            if cutoff is not None:
+                if len(rows) > limit and rows[limit].modified_at == cutoff:
+                    rows += queryset.filter(modified_at=cutoff, id__gt=rows[limit].pk)
+                rows = [obj for obj in rows if obj.modified_at <= cutoff]
+            deleted = [obj.pk for obj in rows if not obj.active]
+            data[name] = {
+                'updated': serializer_class([obj for obj in rows if obj.active], many=True).data,
+                'deleted': deleted + sorted(tombstones[name] - set(deleted)),
+            }
+        return Response(data, status=status.HTTP_200_OK)
+
+# SyncViewSet: GET /api/sync/?since=<data/hora ISO 8601>
+# Devolve os treinos, exercícios de treino, refeições e itens de refeição do usuário alterados depois de since
+# (updated) e os ids dos que foram removidos no período (deleted). Sem since, devolve tudo o que está ativo.
+# deleted junta os registros inativados (DELETE da API) e as remoções definitivas registradas em SyncTombstone.
+# Contrato com o cliente: enviar o until da resposta como since na próxima sincronização e aplicar updated/deleted
+# de forma idempotente (por id). until fica SYNC_LAG_SECONDS antes do momento da consulta, então as janelas se
+# sobrepõem: a resposta traz tudo até agora, e a próxima repete os últimos segundos, pegando gravações que tinham
+# modified_at anterior mas ainda não estavam confirmadas (um registro pode vir em duas respostas seguidas).
+# São quatro consultas (uma por tabela), mais uma para as remoções quando há since.
+# Cada tabela traz no máximo SYNC_PAGE_SIZE registros (em ordem de modified_at, id), inclusive na sincronização
+# inicial. Se alguma passar do limite, a resposta vem com more=True e corta todas as tabelas no mesmo modified_at
+# (cutoff, o do último registro devolvido da tabela cortada), completando os registros com esse mesmo modified_at
+# numa consulta extra; until passa a ser o cutoff (ou fica antes dele, pela folga de SYNC_LAG_SECONDS), e o
+# cliente repete a chamada com since=until enquanto more for True.
+
+
 class UserLogIn(ObtainAuthToken):
+    serializer_class = serializers.CredentialsSerializer
 
     def post(self, request, *args, **kwargs):
-        serializer = self.serializer_class(data=request.data,
-                                           context={'request': request})
-        serializer.is_valid(raise_exception=True)
-        user = serializer.validated_data['user']
-        token, created = Token.objects.get_or_create(user=user)
-        return Response({
-            'token': token.key,
-            'id': user.pk,
-            'username': user.username
-        })
+        with metrics.timer('login.request_seconds'):
+            serializer = self.serializer_class(data=request.data,
+                                               context={'request': request})
+            serializer.is_valid(raise_exception=True)
+            user = serializer.validated_data['user']
+            token, _ = Token.objects.get_or_create(user=user)
+            return Response({
+                'token': token.key,
+                'id': user.pk,
+                'username': user.username
+            })
+
+# As credenciais passam pelo authenticate() do Django (CredentialsSerializer); o token normalmente já existe
+# (criado pelo signal create_auth_token), então o get_or_create é uma única consulta.
+# login.request_seconds e login.authenticate_seconds (core/metrics.py) medem a duração do login e da autenticação.
 
 
 class RegisterView(generics.CreateAPIView):
@@ -193,9 +569,9 @@ class RegisterView(generics.CreateAPIView):
 # O que faz a classe UserLogIn?
 # Sobrescreve o método post da classe base para personalizar o comportamento ao fazer login.
 # Quando o usuário envia as credenciais (username e password), o sistema:
-# Valida as credenciais usando o serializer padrão da classe base.
+# Valida as credenciais com o CredentialsSerializer (authenticate() do Django).
 # Recupera o usuário associado às credenciais.
-# Cria ou recupera um token para esse usuário.
+# Recupera o token desse usuário (criado junto com o usuário, em core/signals.py).
 # Retorna uma resposta contendo:
 # token: O token de autenticação gerado.
 # id: O ID do usuário autenticado.
@@ -209,4 +585,48 @@ class RegisterView(generics.CreateAPIView):
 
 # O que faz a classe RegisterView?
 # Permite que novos usuários sejam registrados.
-# Usa um serializer (RegisterSerializer) para validar os dados de entrada e criar um novo usuário.
\ No newline at end of file
+# Usa um serializer (RegisterSerializer) para validar os dados de entrada e criar um novo usuário.
+
+
+class ExportViewSet(viewsets.ViewSet):
+    permission_classes = [IsAuthenticated]
+
+    @action(detail=False, methods=['get'])
+    def meals(self, request):
+        return self.export(request, 'meals', models.Meal.active_objects.filter(user=request.user))
+
+    @action(detail=False, methods=['get'])
+    def trainings(self, request):
+        return self.export(request, 'trainings', models.Training.active_objects.filter(user=request.user))
+
+    def export(self, request, name, queryset):
+        output = request.query_params.get('output', 'csv')
+        if output not in exports.RENDERERS:
+            return Response({"output": f"Use um dos formatos: {', '.join(exports.RENDERERS)}."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        for param, lookup in (('from', 'date__gte'), ('to', 'date__lte')):
+            if param not in request.query_params:
+                continue
+            try:
+                date = parse_date(request.query_params[param])
+            except ValueError:
+                date = None
+            if date is None:
+                return Response({param: "Informe a data no formato AAAA-MM-DD."}, status=status.HTTP_400_BAD_REQUEST)
+            queryset = queryset.filter(**{lookup: date})
+
+        columns, rows = exports.EXPORTS[name]
+        render, content_type = exports.RENDERERS[output]
+        lines = render(columns, rows(queryset))
+        if isinstance(request._request, ASGIRequest):
+            lines = exports.aiterate(lines)
+        response = StreamingHttpResponse(lines, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="dailyfit-{name}.{output}"'
+        return response
+
+# Exportação do histórico completo do usuário: GET /api/export/meals/ e /api/export/trainings/, com
+# ?output=csv (padrão) ou ?output=ndjson e, opcionalmente, ?from= e ?to= (AAAA-MM-DD), sem limite de período.
+# A resposta é gerada enquanto é enviada (core/exports.py), em memória constante mesmo para vários anos de dados:
+# no WSGI com um iterador síncrono e no ASGI com um iterador assíncrono (o handler ASGI acumularia um iterador
+# síncrono inteiro em memória antes de enviar).
+# O parâmetro se chama output porque ?format= é usado pelo DRF para escolher o renderer.
@@ -13,6 +13,7 @@ import os
 from os.path import exists
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -53,6 +54,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.metrics.InstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -86,6 +88,8 @@ WSGI_APPLICATION = 'dailyFit.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
+SERVER_INTERFACE = os.environ.get('DJANGO_SERVER_INTERFACE', 'wsgi')
+
 DATABASES = {
     'default': {
         'ENGINE': os.environ.get('DB_ENGINE'),
@@ -94,9 +98,34 @@ DATABASES = {
         'PORT': os.environ.get('DB_PORT'),
         'USER': os.environ.get('DB_USER'),
         'PASSWORD': os.environ.get('DB_PASS'),
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60 if SERVER_INTERFACE == 'wsgi' else 0)),
+        'CONN_HEALTH_CHECKS': os.environ.get('DB_CONN_HEALTH_CHECKS', 'true').lower() in ('1', 'true', 'yes'),
     }
 }
 
+if os.environ.get('DB_POOL', 'false').lower() in ('1', 'true', 'yes'):
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+            'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+            'timeout': float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        },
+    }
+
+# Conexões com o banco:
+# SERVER_INTERFACE: 'asgi' quando o processo sobe por dailyFit/asgi.py (que define DJANGO_SERVER_INTERFACE), senão
+# 'wsgi'.
+# DB_CONN_MAX_AGE: segundos que cada conexão fica aberta entre requisições (0 = uma conexão por requisição).
+# Padrão 60 no WSGI e 0 no ASGI.
+# DB_CONN_HEALTH_CHECKS: testa uma conexão reaproveitada antes de usá-la, descartando as que o banco encerrou.
+# DB_POOL=true: usa o pool do psycopg (PostgreSQL, requer o pacote psycopg[pool]), compartilhado pelas threads
+# do processo, com DB_POOL_MIN_SIZE/DB_POOL_MAX_SIZE conexões e DB_POOL_TIMEOUT segundos de espera por uma
+# conexão livre. O pool não funciona junto com CONN_MAX_AGE, que nesse modo fica em 0.
+# Sob ASGI (dailyFit/asgi.py) prefira o pool: cada requisição roda numa thread nova e conexões persistentes
+# ficariam abertas por thread, por isso o padrão do CONN_MAX_AGE nesse caso é 0.
+# Comparação das três opções: python manage.py benchmark_connections
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -130,6 +159,43 @@ CORS_ALLOW_CREDENTIALS = True
 
 CORS_ALLOW_ALL_ORIGINS = True
 
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# O alias "catalog" guarda as respostas de Food, Exercise e MuscleGroup (core/cache.py).
+# O padrão é memória local (um cache por processo, invalidado só no processo que fez a escrita);
+# com mais de um processo use um backend compartilhado, por exemplo:
+# CATALOG_CACHE_BACKEND=django.core.cache.backends.filebased.FileBasedCache e CATALOG_CACHE_LOCATION=/var/tmp/dailyfit
+# CATALOG_CACHE_BACKEND=django.core.cache.backends.redis.RedisCache e CATALOG_CACHE_LOCATION=redis://127.0.0.1:6379
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'catalog': {
+        'BACKEND': os.environ.get('CATALOG_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CATALOG_CACHE_LOCATION', 'catalog'),
+        'TIMEOUT': int(os.environ.get('CATALOG_CACHE_TIMEOUT', 3600)),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.environ.get('CATALOG_CACHE_MAX_ENTRIES', 5000)),
+        },
+    },
+    'auth': {
+        'BACKEND': os.environ.get('AUTH_TOKEN_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('AUTH_TOKEN_CACHE_LOCATION', 'auth'),
+        'TIMEOUT': int(os.environ.get('AUTH_TOKEN_CACHE_TIMEOUT', 300)),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.environ.get('AUTH_TOKEN_CACHE_MAX_ENTRIES', 10000)),
+        },
+    },
+}
+
+CATALOG_CACHE_ALIAS = 'catalog'
+AUTH_TOKEN_CACHE_ALIAS = 'auth'
+
+# O alias "auth" guarda os tokens já validados (core/authentication.py). Em memória local, a remoção de um
+# token ou a desativação de um usuário só limpa o cache do processo que fez a alteração; os demais deixam de
+# aceitar o token em até AUTH_TOKEN_CACHE_TIMEOUT segundos. Com backend compartilhado a invalidação é imediata.
+
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/5.1/howto/static-files/
 
@@ -145,9 +211,78 @@ REST_FRAMEWORK = {
         'django_filters.rest_framework.DjangoFilterBackend'
     ),
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'core.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.metrics.TimedJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
 }
+
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+METRICS_REQUIRE_TOKEN = False
+METRICS_QUERY_ALERT_THRESHOLD = int(os.environ.get('METRICS_QUERY_ALERT_THRESHOLD', 20))
+METRICS_QUERY_ALERT_THRESHOLDS = {
+    'FoodViewSet.import_csv': 0,
+}
+
+# Instrumentação (core/metrics.py): cabeçalho Server-Timing em cada resposta e histogramas em /metrics/.
+# METRICS_TOKEN: se definido, /metrics/ exige Authorization: Bearer <METRICS_TOKEN>.
+# METRICS_REQUIRE_TOKEN: sem METRICS_TOKEN, /metrics/ responde 404 (ligado no perfil prod).
+# METRICS_QUERY_ALERT_THRESHOLD: consultas por requisição acima das quais é registrado um aviso (0 desliga).
+# METRICS_QUERY_ALERT_THRESHOLDS: limites por view, ex.: {'MealViewSet.list': 3}. A importação de alimentos faz
+# algumas consultas por lote de 1000 linhas, então não tem limite.
+
+API_PAGE_SIZE = int(os.environ.get('API_PAGE_SIZE', 50))
+
+API_MAX_PAGE_SIZE = int(os.environ.get('API_MAX_PAGE_SIZE', 500))
+
+SYNC_LAG_SECONDS = int(os.environ.get('SYNC_LAG_SECONDS', 30))
+
+# /api/sync/: o until devolvido (próximo since) fica SYNC_LAG_SECONDS antes do momento da consulta, para que
+# gravações com modified_at anterior, mas confirmadas depois da sincronização, apareçam na seguinte.
+# Deve ser maior que a transação de escrita mais longa da API.
+
+SYNC_PAGE_SIZE = int(os.environ.get('SYNC_PAGE_SIZE', 1000))
+
+# /api/sync/: máximo de registros por tabela numa resposta; acima disso ela vem com more=True (ver SyncViewSet).
+
+# Perfil de execução, escolhido por DJANGO_ENV (variável de ambiente ou dailyFit.config): dev (padrão) ou prod.
+# Em prod:
+# - DEBUG desligado: o Django deixa de guardar cada SQL executado (connection.queries) e não monta páginas de erro.
+# - templates com o loader em cache (admin), sem o context processor de debug.
+# - apenas o JSONRenderer (TimedJSONRenderer): a API navegável do DRF não é montada nem negociada.
+# - sem CsrfViewMiddleware: a API usa token (as views do DRF já são isentas de CSRF) e as views do admin
+#   aplicam a proteção CSRF por conta própria. Sessão, autenticação e mensagens continuam por causa do admin.
+# - /metrics/ só responde com METRICS_TOKEN definido (METRICS_REQUIRE_TOKEN), já que as métricas expõem as rotas
+#   e o volume de uso da API.
+# SECRET_KEY e ALLOWED_HOSTS vêm de DJANGO_SECRET_KEY e DJANGO_ALLOWED_HOSTS (separados por vírgula), obrigatórias:
+# sem elas o Django não inicia, em vez de usar a chave de desenvolvimento e aceitar qualquer Host.
+# Comparação dos dois perfis: python manage.py benchmark_settings
+
+DJANGO_ENV = os.environ.get('DJANGO_ENV', 'dev')
+
+if DJANGO_ENV == 'prod':
+    DEBUG = False
+    for variable in ('DJANGO_SECRET_KEY', 'DJANGO_ALLOWED_HOSTS'):
+        if not os.environ.get(variable):
+            raise ImproperlyConfigured(f'{variable} é obrigatória com DJANGO_ENV=prod.')
+    SECRET_KEY = os.environ['DJANGO_SECRET_KEY']
+    ALLOWED_HOSTS = os.environ['DJANGO_ALLOWED_HOSTS'].split(',')
+    MIDDLEWARE = [middleware for middleware in MIDDLEWARE if middleware != 'django.middleware.csrf.CsrfViewMiddleware']
+    TEMPLATES[0]['APP_DIRS'] = False
+    TEMPLATES[0]['OPTIONS']['loaders'] = [
+        ('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ]
+    TEMPLATES[0]['OPTIONS']['context_processors'] = [
+        processor for processor in TEMPLATES[0]['OPTIONS']['context_processors']
+        if processor != 'django.template.context_processors.debug'
+    ]
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'] = ['core.metrics.TimedJSONRenderer']
+    METRICS_REQUIRE_TOKEN = True
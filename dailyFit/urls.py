@@ -18,6 +18,7 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 
+from core.metrics import metrics_view
 from core.viewsets import UserLogIn, RegisterView
 
 urlpatterns = [
@@ -26,5 +27,6 @@ urlpatterns = [
     path('api-user-login/', UserLogIn.as_view()),
     path('api-user-register/', RegisterView.as_view()),
     path('api/', include('core.urls')),
+    path('metrics/', metrics_view),
 ]
 